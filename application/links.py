@@ -0,0 +1,81 @@
+"""
+    The link graph of the [[Title]] wiki links between the notes of a notebook.
+"""
+from typing import Dict, Iterable, Set, Tuple
+from .markdown import wiki_links
+
+
+class LinkIndex:
+    """
+    The LinkIndex class keeps the outgoing and the incoming wiki links of the notes.
+    It is built from all the notes once and then updated note by note: a saved note is scanned
+    for its links, and the changes of its links are applied to the incoming links of their targets.
+
+    Attributes:
+        outgoing: the titles each note links to, by the title of the note
+        incoming: the titles of the notes that link to each title, by the title.
+            The title may have no note: the links to it are broken until a note with the title is created
+    """
+
+    def __init__(self, notes: Iterable[Tuple[str, str]] = ()) -> None:
+        """
+        Args:
+            notes: pairs of the title and the text of the notes
+        """
+        self.outgoing: Dict[str, Set[str]] = {}
+        self.incoming: Dict[str, Set[str]] = {}
+        for title, text in notes:
+            self.update(title, text)
+
+    def update(self, title: str, text: str) -> None:
+        """
+        Replaces the links of the note with the links in its new text.
+        """
+        old = self.outgoing.pop(title, set())
+        new = wiki_links(text)
+        if new:
+            self.outgoing[title] = new
+        for target in old - new:
+            self._unlink(title, target)
+        for target in new - old:
+            self.incoming.setdefault(target, set()).add(title)
+
+    def remove(self, title: str) -> None:
+        """
+        Removes the links of the deleted note. The links to it are kept, they are broken now.
+        """
+        for target in self.outgoing.pop(title, ()):
+            self._unlink(title, target)
+
+    def rename(self, old_title: str, new_title: str) -> Set[str]:
+        """
+        Moves the links of the note and the links to it to its new title.
+        The texts of the referring notes must be rewritten by the caller.
+
+        Returns:
+            Set[str]: the titles of the notes that link to the note, by their titles after the rename
+        """
+        if old_title in self.outgoing:
+            targets = self.outgoing.pop(old_title)
+            for target in targets:
+                self.incoming[target].discard(old_title)
+                self.incoming[target].add(new_title)
+            self.outgoing[new_title] = targets
+
+        referrers = self.incoming.pop(old_title, set())
+        referrers = {new_title if referrer == old_title else referrer for referrer in referrers}
+        for referrer in referrers:
+            self.outgoing[referrer].discard(old_title)
+            self.outgoing[referrer].add(new_title)
+        if referrers:
+            self.incoming.setdefault(new_title, set()).update(referrers)
+        return referrers
+
+    def backlinks(self, title: str) -> Set[str]:
+        return self.incoming.get(title, set())
+
+    def _unlink(self, title: str, target: str) -> None:
+        referrers = self.incoming[target]
+        referrers.discard(title)
+        if not referrers:
+            del self.incoming[target]
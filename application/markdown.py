@@ -0,0 +1,366 @@
+"""
+    Markdown highlighting for the text areas of the View and Editor sub-apps and rendering to HTML for publishing.
+    Besides Markdown, notes can link to each other by titles with [[Title]] wiki links.
+    The lexer works line by line: the only state that crosses line borders is an open code fence,
+    so it is cached per line and recomputed only from the first edited line forward.
+"""
+import html
+import re
+from typing import Callable, Dict, Iterator, List, Match, Optional, Set, Tuple
+from prompt_toolkit.document import Document
+from prompt_toolkit.formatted_text import StyleAndTextTuples
+from prompt_toolkit.lexers import Lexer
+
+
+FENCE = re.compile(r' {0,3}(`{3,}|~{3,})')
+HEADING = re.compile(r' {0,3}(#{1,6})(?:\s|$)')
+QUOTE = re.compile(r' {0,3}> ?')
+LIST_ITEM = re.compile(r'\s*(?:(?P<bullet>[-*+])|\d{1,9}[.)])(?:\s+|$)')
+# wiki links are found in a pass of their own, so the rest of the inline markup cannot hide them
+WIKI_LINK = re.compile(r'`[^`]+`|\[\[(?P<title>[^\n]+?)\]\]')
+INLINE = re.compile(
+    r'(?P<code>`[^`]+`)'
+    r'|(?P<strong>\*\*[^*]+\*\*|__[^_]+__)'
+    r'|(?P<emphasis>\*[^*\s][^*]*\*|_[^_\s][^_]*_)'
+    r'|(?P<link>\[[^\]]+\]\([^)\s]*\))'
+)
+
+MARKDOWN_STYLE = {
+    'md.heading': 'bold #8B0000',
+    'md.list': 'bold',
+    'md.quote': 'italic #6B4226',
+    'md.fence': '#6B4226',
+    'md.code': 'bg:#F5DEB3 #4B2E05',
+    'md.strong': 'bold',
+    'md.emphasis': 'italic',
+    'md.link': 'underline #00008B',
+    'md.wiki': 'underline #006400',
+}
+
+
+def common_affixes(old: str, new: str) -> Tuple[int, int]:
+    """
+    Returns the lengths of the common prefix and the common suffix of two texts (they do not overlap).
+    Both are found by a binary search over slice comparisons, which keeps the check fast
+    on large notes where a per-line comparison would dominate the cost of a keystroke.
+    """
+    low, high = 0, min(len(old), len(new))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if old[low:middle] == new[low:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    prefix = low
+
+    low, high = 0, min(len(old), len(new)) - prefix
+    while low < high:
+        middle = (low + high + 1) // 2
+        if old[len(old) - middle:len(old) - low] == new[len(new) - middle:len(new) - low]:
+            low = middle
+        else:
+            high = middle - 1
+    return prefix, low
+
+
+def next_state(state: Optional[str], line: str) -> Optional[str]:
+    """
+    Returns the lexer state after the line: the opening marker of a code fence or None.
+    """
+    match = FENCE.match(line)
+    if state is None:
+        return match.group(1) if match else None
+    if match and match.group(1)[0] == state[0] and len(match.group(1)) >= len(state):
+        return None
+    return state
+
+
+def lex_line(state: Optional[str], line: str) -> StyleAndTextTuples:
+    """
+    Splits a line into (style, text) fragments, given the lexer state the line starts with.
+    """
+    if state is not None:
+        return [('class:md.fence' if next_state(state, line) is None else 'class:md.code', line)]
+    if FENCE.match(line):
+        return [('class:md.fence', line)]
+    if HEADING.match(line):
+        return [('class:md.heading', line)]
+    if QUOTE.match(line):
+        return [('class:md.quote', line)]
+
+    fragments: StyleAndTextTuples = []
+    position = 0
+    if match := LIST_ITEM.match(line):
+        fragments.append(('class:md.list', match.group()))
+        position = match.end()
+    links = wiki_link_matches(line)
+    for match in inline_matches(line, links, position):
+        fragments.extend(_link_fragments('', line, position, match.start(), links))
+        if match.lastgroup == 'code':
+            fragments.append(('class:md.code', line[match.start():match.end()]))
+        else:
+            fragments.extend(_link_fragments(f'class:md.{match.lastgroup}', line, *match.span(), links))
+        position = match.end()
+    fragments.extend(_link_fragments('', line, position, len(line), links))
+    return fragments
+
+
+def _link_fragments(style: str, line: str, start: int, end: int, links: List[Match[str]]) -> StyleAndTextTuples:
+    """
+    Splits a part of the line into fragments of the style, the wiki links in it are highlighted on top of the style.
+    """
+    fragments: StyleAndTextTuples = []
+    for link in links:
+        if start <= link.start() and link.end() <= end:
+            if link.start() > start:
+                fragments.append((style, line[start:link.start()]))
+            fragments.append((f'{style} class:md.wiki'.strip(), link.group()))
+            start = link.end()
+    if start < end:
+        fragments.append((style, line[start:end]))
+    return fragments
+
+
+def wiki_link_matches(line: str) -> List[Match[str]]:
+    """
+    Returns the matches of the wiki links in the line, the titles are in their 'title' group.
+    The links in code spans are not links.
+    """
+    if '[[' not in line:
+        return []
+    return [match for match in WIKI_LINK.finditer(line) if match.group('title') is not None]
+
+
+def inline_matches(line: str, links: List[Match[str]], position: int = 0) -> Iterator[Match[str]]:
+    """
+    Returns the matches of the inline markup other than the wiki links, from the position on.
+    The links are masked, so emphasis may enclose a link, but no markup is matched inside one.
+    The matched text is masked too: the tokens must be sliced from the line by their spans.
+    """
+    if links:
+        parts, start = [], 0
+        for link in links:
+            parts += [line[start:link.start()], '\0' * (link.end() - link.start())]
+            start = link.end()
+        line = ''.join(parts) + line[start:]
+    return INLINE.finditer(line, position)
+
+
+def _outside_fences(lines: List[str]) -> Iterator[int]:
+    """
+    Returns the indexes of the lines that are not in code fences and are not fence markers.
+    """
+    state: Optional[str] = None
+    for lineno, line in enumerate(lines):
+        new_state = next_state(state, line)
+        if state is None and new_state is None:
+            yield lineno
+        state = new_state
+
+
+def wiki_links(text: str) -> Set[str]:
+    """
+    Returns the titles the note links to. The links in code spans and code fences are not links.
+    """
+    lines = text.split('\n')
+    return {
+        match.group('title')
+        for lineno in _outside_fences(lines)
+        for match in wiki_link_matches(lines[lineno])
+    }
+
+
+def rename_wiki_links(text: str, old_title: str, new_title: str) -> str:
+    """
+    Returns the text with the wiki links to the old title pointing to the new title.
+    Only the links wiki_links finds are rewritten, the text of code spans and code fences is kept.
+    """
+    lines = text.split('\n')
+    for lineno in _outside_fences(lines):
+        line = lines[lineno]
+        if f'[[{old_title}]]' in line:
+            for match in reversed(wiki_link_matches(line)):
+                if match.group('title') == old_title:
+                    line = f'{line[:match.start()]}[[{new_title}]]{line[match.end():]}'
+            lines[lineno] = line
+    return '\n'.join(lines)
+
+
+def wiki_link_at(line: str, column: int) -> str | None:
+    """
+    Returns the title of the wiki link under the column of the line, or of the first link in the line.
+    """
+    links = wiki_link_matches(line)
+    for match in links:
+        if match.start() <= column < match.end():
+            return match.group('title')
+    return links[0].group('title') if links else None
+
+
+def inline_to_html(text: str, wiki_href: Callable[[str], str] | None = None) -> str:
+    """
+    Renders the inline markup of a line to HTML.
+    Wiki links are rendered as links to wiki_href(title), or as text if wiki_href is not specified.
+    """
+    links = wiki_link_matches(text)
+
+    def with_links(start: int, end: int, href: Callable[[str], str] | None) -> str:
+        parts = []
+        for link in links:
+            if start <= link.start() and link.end() <= end:
+                title = link.group('title')
+                parts.append(html.escape(text[start:link.start()]))
+                if href is None:
+                    parts.append(html.escape(title))
+                else:
+                    parts.append(f'<a href="{html.escape(href(title))}">{html.escape(title)}</a>')
+                start = link.end()
+        parts.append(html.escape(text[start:end]))
+        return ''.join(parts)
+
+    parts = []
+    position = 0
+    for match in inline_matches(text, links):
+        parts.append(with_links(position, match.start(), wiki_href))
+        start, end = match.span()
+        if match.lastgroup == 'code':
+            parts.append(f'<code>{html.escape(text[start + 1:end - 1])}</code>')
+        elif match.lastgroup == 'strong':
+            parts.append(f'<strong>{with_links(start + 2, end - 2, wiki_href)}</strong>')
+        elif match.lastgroup == 'emphasis':
+            parts.append(f'<em>{with_links(start + 1, end - 1, wiki_href)}</em>')
+        else:
+            # links cannot be nested, so the wiki links in the label are rendered as text
+            label_end = start + match.group().index('](')
+            url = html.escape(text[label_end + 2:end - 1])
+            parts.append(f'<a href="{url}">{with_links(start + 1, label_end, None)}</a>')
+        position = end
+    parts.append(with_links(position, len(text), wiki_href))
+    return ''.join(parts)
+
+
+def to_html(text: str, wiki_href: Callable[[str], str] | None = None) -> str:
+    """
+    Renders a note to HTML by the same rules the lexer highlights it by.
+    Consecutive lines of a paragraph, a quote or a list are grouped into one element.
+    Wiki links point to wiki_href(title).
+    """
+    parts: List[str] = []
+    block: str | None = None
+    state: Optional[str] = None
+
+    def open_block(tag: str | None) -> None:
+        nonlocal block
+        if block != tag:
+            if block:
+                parts.append(f'</{block}>')
+            if tag:
+                parts.append(f'<{tag}>')
+            block = tag
+
+    for line in text.split('\n'):
+        new_state = next_state(state, line)
+        if state is not None:
+            parts.append('</code></pre>' if new_state is None else html.escape(line))
+        elif new_state is not None:
+            open_block(None)
+            parts.append('<pre><code>')
+        elif match := HEADING.match(line):
+            open_block(None)
+            level = len(match.group(1))
+            parts.append(f'<h{level}>{inline_to_html(line[match.end():].strip(), wiki_href)}</h{level}>')
+        elif match := QUOTE.match(line):
+            open_block('blockquote')
+            parts.append(inline_to_html(line[match.end():], wiki_href))
+        elif match := LIST_ITEM.match(line):
+            open_block('ul' if match.group('bullet') else 'ol')
+            parts.append(f'<li>{inline_to_html(line[match.end():], wiki_href)}</li>')
+        elif line.strip():
+            open_block('p')
+            parts.append(inline_to_html(line, wiki_href))
+        else:
+            open_block(None)
+        state = new_state
+
+    if state is not None:
+        parts.append('</code></pre>')
+    open_block(None)
+    return '\n'.join(parts)
+
+
+class MarkdownLexer(Lexer):
+    """
+    The MarkdownLexer class highlights headings, lists, quotes, code fences, emphasis, links and wiki links.
+    An instance keeps the state of the last lexed document, so it must not be shared between text areas.
+
+    Attributes:
+        lexed_lines: the number of lines whose state has been computed (used by tests and benchmarks)
+        _text: the text of the last lexed document
+        _lines: the lines of the last lexed document
+        _states: the lexer state at the start of each line, known for a prefix of the document
+        _tail: the line from which the text is the same as before the last edit
+            and the states of the previous document from that line on
+    """
+
+    def __init__(self) -> None:
+        self.lexed_lines = 0
+        self._text = ''
+        self._lines: List[str] = ['']
+        self._states: List[Optional[str]] = [None]
+        self._tail: Tuple[int, List[Optional[str]]] = (0, [])
+
+    def _sync(self, document: Document) -> None:
+        """
+        Drops the cached states that the difference between the last and the new document may affect.
+        The state at the start of the first changed line depends only on the lines above it, so it is kept.
+        The states below the changed lines are put aside: they are valid again
+        as soon as the recomputed state of an unchanged line matches the old one.
+        """
+        text = document.text
+        if text is self._text:
+            return
+        prefix, suffix = common_affixes(self._text, text)
+        first_changed = text.count('\n', 0, prefix)
+        first_unchanged = first_changed + text.count('\n', prefix, len(text) - suffix) + 1
+        shift = len(document.lines) - len(self._lines)
+
+        self._tail = (first_unchanged, self._states[first_unchanged - shift:])
+        del self._states[first_changed + 1:]
+        self._text = text
+        self._lines = document.lines
+
+    def _extend_states(self, lineno: int) -> None:
+        """
+        Computes the states up to the given line, reusing the put aside states once they converge.
+        """
+        lines, states = self._lines, self._states
+        first_unchanged, tail = self._tail
+        while len(states) <= lineno:
+            states.append(next_state(states[-1], lines[len(states) - 1]))
+            self.lexed_lines += 1
+
+            offset = len(states) - 1 - first_unchanged
+            if 0 <= offset < len(tail) and states[-1] == tail[offset]:
+                states.extend(tail[offset + 1:])
+                self._tail = first_unchanged, tail = (0, [])
+
+    def lex_document(self, document: Document) -> Callable[[int], StyleAndTextTuples]:
+        """
+        Returns a function that highlights a single line. States are computed lazily up to
+        the requested line, so the lines below the visible part of a note are never lexed.
+        """
+        self._sync(document)
+        fragments_cache: Dict[int, StyleAndTextTuples] = {}
+
+        def get_line(lineno: int) -> StyleAndTextTuples:
+            if lineno in fragments_cache:
+                return fragments_cache[lineno]
+            # prompt-toolkit may still hold the function for one of the previous documents
+            self._sync(document)
+            if not 0 <= lineno < len(self._lines):
+                return []
+            self._extend_states(lineno)
+            fragments_cache[lineno] = lex_line(self._states[lineno], self._lines[lineno])
+            return fragments_cache[lineno]
+
+        return get_line
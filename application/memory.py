@@ -0,0 +1,216 @@
+"""
+    Opt-in memory accounting for the app.
+    Allocations traced by tracemalloc are attributed to the subsystems of the app at every transition
+    between sub-apps, and a memory budget makes the caches of the app release memory when it is exceeded.
+"""
+import gc
+import inspect
+import os
+import sys
+import tracemalloc
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, Iterator, List, TextIO, Tuple
+from prompt_toolkit.application import Application
+from prompt_toolkit.buffer import Buffer
+from prompt_toolkit.document import Document
+from prompt_toolkit.layout.controls import BufferControl
+from prompt_toolkit.widgets import RadioList
+from . import links, markdown, notebooks, sub_apps, user
+from .notebooks import Notebooks
+from .widgets import NoteList
+
+
+SUBSYSTEMS = ('notes', 'gallery', 'buffers', 'undo', 'other')
+TRACEBACK_LIMIT = 5
+STATM = '/proc/self/statm'
+
+# the code whose allocations belong to a subsystem: (subsystem, file, first line, last line)
+CodeRange = Tuple[str, str, int, int]
+
+
+def _code_range(subsystem: str, obj: object) -> CodeRange:
+    lines, first_line = inspect.getsourcelines(obj)
+    return subsystem, inspect.getsourcefile(obj), max(first_line, 1), first_line + len(lines)
+
+
+def _class_code_ranges(subsystem: str, *classes: type) -> List[CodeRange]:
+    """
+    Returns the code ranges of the classes and their base classes, so the code a widget inherits
+    from the private bases of prompt_toolkit belongs to the subsystem too.
+    """
+    bases = dict.fromkeys(base for cls in classes for base in cls.__mro__)
+    return [_code_range(subsystem, base) for base in bases if base.__module__ not in ('builtins', 'typing')]
+
+
+def _code_ranges() -> Dict[str, List[Tuple[str, int, int]]]:
+    """
+    Returns the code ranges by their files, in the order they are matched in. The undo code of Buffer
+    goes before the rest of Buffer, which belongs to the text buffers of View and Editor.
+    """
+    code_ranges: Dict[str, List[Tuple[str, int, int]]] = defaultdict(list)
+    for subsystem, filename, first_line, last_line in [
+        _code_range('undo', Buffer.save_to_undo_stack),
+        _code_range('undo', Buffer.undo),
+        _code_range('undo', Buffer.redo),
+        _code_range('gallery', sub_apps.gallery),
+        *_class_code_ranges('gallery', NoteList, RadioList),
+        _code_range('buffers', sub_apps.view),
+        _code_range('buffers', sub_apps.editor),
+        _code_range('buffers', Buffer),
+        _code_range('buffers', Document),
+        _code_range('buffers', markdown),
+        _code_range('notes', user),
+        _code_range('notes', notebooks),
+        _code_range('notes', links),
+    ]:
+        code_ranges[filename].append((subsystem, first_line, last_line))
+    return code_ranges
+
+
+def _buffers(sub_app: Application) -> Iterator[Buffer]:
+    for window in sub_app.layout.find_all_windows():
+        if isinstance(window.content, BufferControl):
+            yield window.content.buffer
+
+
+class MemoryAccountant:
+    """
+    The MemoryAccountant class takes a tracemalloc snapshot at every transition between sub-apps
+    and writes the memory of each subsystem to the report. A snapshot is taken while the finished
+    sub-app is still alive, so its widgets, buffers and undo stacks are accounted.
+
+    Allocations are attributed to the subsystem of the innermost frame in their traceback that
+    belongs to a known code range. The objects owned by the notes and the undo stacks are then moved
+    to these subsystems wherever they were allocated: e.g. an edited note is allocated by the Buffer
+    of the editor, but it is owned by the notes.
+
+    Attributes:
+        budget: the budget of the resident memory in bytes, or None if there is no budget
+        report: the file the snapshots are written to, or None if the allocations are not accounted
+        on_over_budget: callables that release memory when the budget is exceeded
+        _code_ranges: the code ranges of the subsystems, they are built only if the allocations are accounted
+        _subsystems: the subsystems of the tracebacks that have already been attributed
+        _over_budget: whether the memory stayed over the budget after the last release
+    """
+
+    def __init__(self, budget: int | None = None, report: TextIO | None = None) -> None:
+        """
+        Starts tracing the allocations if they are accounted. Tracing slows the app down many times,
+        so the budget is kept by the resident memory of the process where the system reports it,
+        and by the traced memory elsewhere.
+
+        Args:
+            budget: the memory budget in bytes
+            report: the file the snapshots are written to
+        """
+        self.budget = budget
+        self.report = report
+        self.on_over_budget: List[Callable[[], None]] = []
+        self._code_ranges = _code_ranges() if report else {}
+        self._subsystems: Dict[tracemalloc.Traceback, str] = {}
+        self._over_budget = False
+        if report:
+            tracemalloc.start(TRACEBACK_LIMIT)
+            print('transition'.ljust(28) + ''.join(f'{name:>14}' for name in ('total', *SUBSYSTEMS)), file=report)
+        elif budget is not None and not os.path.exists(STATM):
+            tracemalloc.start(1)
+
+    def checkpoint(self, transition: str, notebooks: Notebooks, sub_app: Application) -> None:
+        """
+        Accounts the memory after the transition and releases the memory if the budget is exceeded.
+
+        Arguments:
+            transition: the name of the transition.
+            notebooks: the notebooks of the user.
+            sub_app: the sub-app that has just finished.
+        """
+        if self.report:
+            sizes = self.account(notebooks, sub_app)
+            print(
+                transition.ljust(28) + ''.join(f'{size // 1024:>11} KiB' for size in sizes.values()),
+                file=self.report,
+                flush=True,
+            )
+
+        self.keep_budget()
+
+    def keep_budget(self) -> None:
+        """
+        Releases the memory once the budget is exceeded. If the release does not bring the memory
+        under the budget, it is not repeated until the memory goes under the budget and over it again:
+        the released caches would only be rebuilt and released at every check.
+        """
+        if self.budget is None:
+            return
+        if self.used_memory() <= self.budget:
+            self._over_budget = False
+        elif not self._over_budget:
+            for release in self.on_over_budget:
+                release()
+            gc.collect()
+            self._over_budget = self.used_memory() > self.budget
+
+    @staticmethod
+    def used_memory() -> int:
+        """
+        Returns the resident memory of the process, or the traced memory if the system does not report it.
+        """
+        try:
+            with open(STATM) as file:
+                return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except OSError:
+            return tracemalloc.get_traced_memory()[0]
+
+    def account(self, notebooks: Notebooks, sub_app: Application) -> Dict[str, int]:
+        """
+        Returns the traced memory in total and by the subsystems.
+        """
+        sizes = dict.fromkeys(SUBSYSTEMS, 0)
+        for statistic in tracemalloc.take_snapshot().statistics('traceback'):
+            sizes[self._subsystem(statistic.traceback)] += statistic.size
+
+        for owner, objects in self._owned_objects(notebooks, sub_app).items():
+            for obj in objects:
+                traceback = tracemalloc.get_object_traceback(obj)
+                if traceback is None:
+                    continue
+                size = sys.getsizeof(obj)
+                allocator = self._subsystem(traceback)
+                moved = min(size, sizes[allocator])
+                sizes[allocator] -= moved
+                sizes[owner] += moved
+
+        return {'total': sum(sizes.values()), **sizes}
+
+    def _subsystem(self, traceback: tracemalloc.Traceback) -> str:
+        if traceback not in self._subsystems:
+            self._subsystems[traceback] = 'other'
+            for frame in reversed(traceback):
+                if subsystem := self._frame_subsystem(frame.filename, frame.lineno):
+                    self._subsystems[traceback] = subsystem
+                    break
+        return self._subsystems[traceback]
+
+    def _frame_subsystem(self, filename: str, lineno: int) -> str | None:
+        for subsystem, first_line, last_line in self._code_ranges.get(filename, ()):
+            if first_line <= lineno <= last_line:
+                return subsystem
+        return None
+
+    @staticmethod
+    def _owned_objects(notebooks: Notebooks, sub_app: Application) -> Dict[str, Iterable[object]]:
+        notes: Dict[int, object] = {}
+        for user_data in notebooks.open_notebooks():
+            notes[id(user_data.history)] = user_data.history
+            notes[id(user_data.notes)] = user_data.notes
+            for title, text in user_data.notes.items():
+                notes[id(title)] = title
+                notes[id(text)] = text
+
+        undo: Dict[int, object] = {}
+        for buffer in _buffers(sub_app):
+            for text, _ in buffer._undo_stack + buffer._redo_stack:
+                if id(text) not in notes and text is not buffer.text:
+                    undo[id(text)] = text
+
+        return {'notes': notes.values(), 'undo': undo.values()}
@@ -1,7 +1,9 @@
 from prompt_toolkit.application import Application
 from typing import Callable
+from .memory import MemoryAccountant
+from .notebooks import Notebooks
+from .sub_apps import gallery, notebook_factory, picker
 from .user import UserData
-from .sub_apps import gallery
 
 
 class NoteApp:
@@ -10,23 +12,30 @@ class NoteApp:
     it`s responsible for managing the user data, file paths, and the flow of sub-applications.
     """
 
-    def __init__(self, user_data: UserData) -> None:
+    def __init__(self, notebooks: Notebooks, memory: MemoryAccountant | None = None) -> None:
         """
-        Setting the path to the file with user and application data states
+        Setting the notebooks of the user whose data the sub-applications work with
 
         Instance attributes:
 
-            user_data: an instance of UserData class to store user data.
+            notebooks: an instance of Notebooks class to store the notebooks of the user.
+                The sub-apps that manage the notebooks get it, the rest get the user data of the active notebook.
+            memory: an instance of MemoryAccountant class that accounts the memory at every transition
+                and keeps the memory budget, or None if the memory is not accounted.
 
             States:
 
             cur_sub_app: current active sub-app. When an instance of the class is initialised,
-                it is always in the "gallery" state.
+                it is always in the "picker" state.
             prev_sub_app: previous active sub-app. Influences the logic behavior of the current state
         """
         self._prev_sub_app: Callable[..., Application] | None = None
-        self._cur_sub_app: Callable[..., Application] | None = gallery
-        self.user_data = user_data
+        self._cur_sub_app: Callable[..., Application] | None = picker
+        self.notebooks = notebooks
+        self.memory = memory
+        if memory:
+            memory.on_over_budget.append(notebooks.release_inactive)
+            memory.on_over_budget.append(notebooks.release_caches)
 
     def run(self) -> None:
         """
@@ -34,9 +43,54 @@ class NoteApp:
         """
         note_num = 0
         while self._cur_sub_app:
-            sub_app = self._cur_sub_app(self.user_data, note_num, self._prev_sub_app)
-            next_sub_app, note_num = sub_app.run()
-            self._prev_sub_app = self._cur_sub_app
-            self._cur_sub_app = next_sub_app
+            note_num = self._run_sub_app(note_num)
 
-        self.user_data.dump_data()
+        self.notebooks.dump_data()
+
+    def _run_sub_app(self, note_num: int) -> int:
+        """
+        Runs the current sub-application and switches the state to the one it results in.
+
+        Arguments:
+            note_num: the index of the note the current sub-app works with.
+
+        Returns:
+            int: the index of the note for the next sub-app.
+        """
+        if self._cur_sub_app in (picker, notebook_factory):
+            data = self.notebooks
+        else:
+            data = self.notebooks.active
+        sub_app = self._cur_sub_app(data, note_num, self._prev_sub_app)
+        next_sub_app, note_num = sub_app.run()
+        if next_sub_app is gallery and isinstance(data, UserData):
+            note_num = self._compact_trash(data, note_num)
+            # the changes are dumped on the way back to the gallery, so `mynotes serve` can show them
+            if data.changed:
+                data.dump_data()
+        if self.memory:
+            transition = f'{self._cur_sub_app.__name__} -> {getattr(next_sub_app, "__name__", None)}'
+            self.memory.checkpoint(transition, self.notebooks, sub_app)
+        self._prev_sub_app = self._cur_sub_app
+        self._cur_sub_app = next_sub_app
+        return note_num
+
+    @staticmethod
+    def _compact_trash(data: UserData, note_num: int | None) -> int | None:
+        """
+        Compacts the trash on the first way to the gallery after the notebook is opened,
+        if it holds old notes or has outgrown its limit.
+        The compaction removes notes from the history, so the index of the note selected in the gallery
+        is looked up again by its title.
+
+        Arguments:
+            data: the user data of the active notebook.
+            note_num: the index of the note selected in the gallery.
+
+        Returns:
+            int | None: the index of the same note after the compaction.
+        """
+        title = data.history[note_num] if note_num is not None and 0 <= note_num < len(data.history) else None
+        if not data.compact_trash():
+            return note_num
+        return data.history.index(title) if title in data.notes else None
@@ -0,0 +1,93 @@
+import os
+from collections import OrderedDict
+from typing import List
+from .user import DATA_ROOT, UserData
+
+
+class Notebooks:
+    """
+    The Notebooks class represents the notebooks of the user: files with user data stored in one directory.
+    Only the active notebook is opened on switching. It and a few recently used notebooks
+    are kept open, so switching back to them is instant; the rest are dumped and released.
+
+    Attributes:
+        data_root: directory where the notebooks are stored
+        capacity: the maximum number of notebooks kept open
+        _active: the name of the active notebook
+        _open: the open notebooks by their names, the most recently used are at the end
+    """
+
+    def __init__(self, data_root: str = DATA_ROOT, capacity: int = 3) -> None:
+        """
+        Args:
+            data_root: directory where the notebooks are stored. It is created if it does not exist
+            capacity: the maximum number of notebooks kept open
+        """
+        self.data_root = data_root
+        self.capacity = capacity
+        self._active: str | None = None
+        self._open: OrderedDict[str, UserData] = OrderedDict()
+        os.makedirs(data_root, exist_ok=True)
+
+    @property
+    def active(self) -> UserData:
+        """
+        The user data of the active notebook.
+        """
+        if self._active is None:
+            raise LookupError('No notebook is active')
+        return self._open[self._active]
+
+    def names(self) -> List[str]:
+        """
+        Returns the sorted names of the notebooks, including the open ones that have not been dumped yet.
+        """
+        names = set(self._open)
+        for filename in os.listdir(self.data_root):
+            name, ext = os.path.splitext(filename)
+            if ext == UserData._file_ext:
+                names.add(name)
+        return sorted(names)
+
+    def switch(self, name: str) -> UserData:
+        """
+        Makes the notebook active, opening it (or creating a new one) if it is not open.
+        The least recently used notebooks beyond the capacity are dumped and released.
+        """
+        if name not in self._open:
+            self._open[name] = UserData(name, self.data_root)
+        self._open.move_to_end(name)
+        self._active = name
+
+        while len(self._open) > self.capacity:
+            _, user_data = self._open.popitem(last=False)
+            user_data.dump_data()
+        return self._open[name]
+
+    def open_notebooks(self) -> List[UserData]:
+        """
+        Returns the user data of the open notebooks, the most recently used last.
+        """
+        return list(self._open.values())
+
+    def release_inactive(self) -> None:
+        """
+        Dumps and releases all open notebooks except the active one.
+        """
+        for name in list(self._open):
+            if name != self._active:
+                self._open.pop(name).dump_data()
+
+    def release_caches(self) -> None:
+        """
+        Drops the caches of all open notebooks.
+        """
+        for user_data in self._open.values():
+            user_data.release_caches()
+
+    def dump_data(self) -> None:
+        """
+        Dumps the data of all open notebooks.
+        """
+        for user_data in self._open.values():
+            user_data.dump_data()
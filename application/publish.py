@@ -0,0 +1,144 @@
+"""
+    Incremental export of a notebook to a static HTML site.
+
+    Every note is rendered to its own page and the index page lists the notes in the order of the history.
+    The manifest of the site keeps a content hash of every page, so a rerun renders only the notes that have
+    been created or changed since the last publish and deletes the pages of the deleted notes.
+"""
+import hashlib
+import html
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, List, NamedTuple, Tuple
+from .markdown import to_html
+from .user import UserData
+
+
+# bump it when the rendering changes, so all pages are rendered again
+RENDER_VERSION = '2'
+MANIFEST = 'manifest.json'
+INDEX = 'index.html'
+# below this number of pages starting the worker processes costs more than it saves
+PARALLEL_THRESHOLD = 200
+
+PAGE = '''<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+</head>
+<body>
+{body}
+</body>
+</html>
+'''
+
+
+class PublishResult(NamedTuple):
+    rendered: int
+    deleted: int
+    unchanged: int
+
+
+def page_name(title: str) -> str:
+    """
+    Returns the file name of the page of the note. It depends only on the title, so it is stable between runs.
+    """
+    return hashlib.sha1(title.encode()).hexdigest()[:16] + '.html'
+
+
+def content_hash(title: str, text: str) -> str:
+    return hashlib.sha1(f'{RENDER_VERSION}\0{title}\0{text}'.encode()).hexdigest()
+
+
+def render_page(title: str, text: str, index: str = INDEX, wiki_href: Callable[[str], str] = page_name) -> str:
+    return PAGE.format(
+        title=html.escape(title),
+        body=f'<p><a href="{index}">Index</a></p>\n<h1>{html.escape(title)}</h1>\n{to_html(text, wiki_href)}',
+    )
+
+
+def render_index(name: str, titles: Iterable[str]) -> str:
+    items = '\n'.join(f'<li><a href="{page_name(title)}">{html.escape(title)}</a></li>' for title in titles)
+    return PAGE.format(title=html.escape(name), body=f'<h1>{html.escape(name)}</h1>\n<ul>\n{items}\n</ul>')
+
+
+def _write(path: str, content: str) -> None:
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        file.write(content)
+    os.replace(tmp_path, path)
+
+
+def _write_pages(output_dir: str, notes: List[Tuple[str, str]]) -> None:
+    for title, text in notes:
+        _write(os.path.join(output_dir, page_name(title)), render_page(title, text))
+
+
+def publish(
+    user_data: UserData,
+    output_dir: str,
+    titles: Iterable[str] | None = None,
+    jobs: int | None = None,
+) -> PublishResult:
+    """
+    Renders the notes to HTML pages in the output directory, skipping the pages that are up to date.
+    A large number of pages is rendered in a process pool.
+
+    Args:
+        user_data: the notebook to publish
+        output_dir: the directory of the site. It is created if it does not exist
+        titles: titles of the notes to publish, all notes are published if it is not specified.
+            The notes in the trash are never published
+        jobs: the number of worker processes, the number of CPUs is used if it is not specified
+
+    Returns:
+        PublishResult: the numbers of the rendered, deleted and unchanged pages
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST)
+    try:
+        with open(manifest_path, encoding='utf-8') as file:
+            old_manifest: Dict[str, str] = json.load(file)
+    except FileNotFoundError:
+        old_manifest = {}
+
+    selected = set(titles) if titles is not None else None
+    published = [
+        title for title in user_data.history
+        if (selected is None or title in selected) and title not in user_data.trash
+    ]
+    manifest: Dict[str, str] = {}
+    changed: List[Tuple[str, str]] = []
+    for title in published:
+        name, digest = page_name(title), content_hash(title, user_data.notes[title])
+        manifest[name] = digest
+        if old_manifest.get(name) != digest:
+            changed.append((title, user_data.notes[title]))
+
+    if len(changed) < PARALLEL_THRESHOLD or jobs == 1:
+        _write_pages(output_dir, changed)
+    else:
+        workers = jobs or os.cpu_count() or 1
+        # a few chunks per worker balance the load without sending every note separately
+        chunks = [changed[i::workers * 4] for i in range(workers * 4)]
+        with ProcessPoolExecutor(workers) as executor:
+            for _ in executor.map(_write_pages, [output_dir] * len(chunks), chunks):
+                pass
+
+    deleted = [name for name in old_manifest if name not in manifest and name != INDEX]
+    for name in deleted:
+        try:
+            os.remove(os.path.join(output_dir, name))
+        except FileNotFoundError:
+            pass
+
+    index = render_index(user_data.name, published)
+    manifest[INDEX] = hashlib.sha1(index.encode()).hexdigest()
+    if old_manifest.get(INDEX) != manifest[INDEX] or not os.path.exists(os.path.join(output_dir, INDEX)):
+        _write(os.path.join(output_dir, INDEX), index)
+
+    if manifest != old_manifest:
+        _write(manifest_path, json.dumps(manifest))
+    return PublishResult(len(changed), len(deleted), len(published) - len(changed))
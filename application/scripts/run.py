@@ -1,11 +1,86 @@
+import argparse
+import asyncio
+import os
+from application.memory import MemoryAccountant
 from application.note_app import NoteApp
-from application.user import UserData
+from application.notebooks import Notebooks
+from application.publish import publish
+from application.server import serve
+from application.user import DATA_ROOT
+
+
+def run_app(args: argparse.Namespace) -> None:
+    notebooks = Notebooks(args.data_root)
+    if args.memory_report is None and args.memory_budget is None:
+        NoteApp(notebooks).run()
+        return
+
+    with open(args.memory_report or os.devnull, 'w') as report:
+        memory = MemoryAccountant(
+            budget=None if args.memory_budget is None else args.memory_budget * 1024 * 1024,
+            report=report if args.memory_report else None,
+        )
+        NoteApp(notebooks, memory).run()
+
+
+def run_publish(args: argparse.Namespace) -> None:
+    notebooks = Notebooks(args.data_root)
+    if args.notebook not in notebooks.names():
+        raise SystemExit(f'mynotes publish: there is no notebook {args.notebook!r} in {args.data_root}')
+    user_data = notebooks.switch(args.notebook)
+    titles = None
+    if args.tag:
+        titles = [title for title in user_data.history if args.tag in user_data.tags.get(title, ())]
+    result = publish(user_data, args.output, titles, args.jobs)
+    print(f'{result.rendered} rendered, {result.deleted} deleted, {result.unchanged} unchanged pages in {args.output}')
+
+
+def run_serve(args: argparse.Namespace) -> None:
+    if args.notebook not in Notebooks(args.data_root).names():
+        raise SystemExit(f'mynotes serve: there is no notebook {args.notebook!r} in {args.data_root}')
+    try:
+        memory = None if args.memory_budget is None else MemoryAccountant(budget=args.memory_budget * 1024 * 1024)
+        asyncio.run(serve(args.notebook, args.data_root, args.host, args.port, memory))
+    except KeyboardInterrupt:
+        pass
 
 
 def main():
-    user_data = UserData()
-    app = NoteApp(user_data)
-    app.run()
+    parser = argparse.ArgumentParser(prog='mynotes', description='A simple CLI app for taking notes')
+    parser.add_argument(
+        '--data-root',
+        default=os.environ.get('MYNOTES_DATA_ROOT', DATA_ROOT),
+        help='directory where the notebooks are stored, can be set by $MYNOTES_DATA_ROOT (default: %(default)s)',
+    )
+    parser.add_argument(
+        '--memory-report',
+        metavar='FILE',
+        help='account the memory of the subsystems at every transition between windows and write it to the file',
+    )
+    parser.add_argument(
+        '--memory-budget',
+        metavar='MB',
+        type=int,
+        help='release the inactive notebooks and the caches when the app uses more memory than the budget',
+    )
+    parser.set_defaults(command=run_app)
+    subparsers = parser.add_subparsers(title='commands')
+
+    publish_parser = subparsers.add_parser('publish', help='export the notebook to a static HTML site')
+    publish_parser.add_argument('output', help='directory of the site')
+    publish_parser.add_argument('--notebook', default='userdata', help='notebook to publish (default: %(default)s)')
+    publish_parser.add_argument('--tag', help='publish only the notes with the tag')
+    publish_parser.add_argument('--jobs', type=int, help='number of worker processes (default: number of CPUs)')
+    publish_parser.set_defaults(command=run_publish)
+
+    serve_parser = subparsers.add_parser('serve', help='serve the notebook read-only over HTTP')
+    serve_parser.add_argument('--notebook', default='userdata', help='notebook to serve (default: %(default)s)')
+    serve_parser.add_argument('--host', default='127.0.0.1', help='address to listen on (default: %(default)s)')
+    serve_parser.add_argument('--port', type=int, default=8000, help='port to listen on (default: %(default)s)')
+    serve_parser.set_defaults(command=run_serve)
+
+    args = parser.parse_args()
+    args.command(args)
 
 
 if __name__ == '__main__':
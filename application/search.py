@@ -0,0 +1,102 @@
+"""
+    Saved searches over the notes of a notebook.
+
+    The results of a search are cached with the generation of the notebook they were evaluated at.
+    While the generation is the same the cached results are valid, and when it is not, the search
+    is evaluated again only against the notes that changed since then.
+"""
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, NamedTuple, Set, Tuple
+
+if TYPE_CHECKING:
+    from .user import UserData
+
+
+class SavedSearch(NamedTuple):
+    """
+    A search by a substring of the title, a tag and a range of the modification dates.
+    The criteria that are not specified match every note.
+
+    Attributes:
+        query: the text of the search, it is also its name
+        text: the substring of the title, in lower case
+        tag: the tag
+        since: the earliest modification time (a timestamp)
+        until: the latest modification time (a timestamp)
+    """
+
+    query: str
+    text: str = ''
+    tag: str | None = None
+    since: float | None = None
+    until: float | None = None
+
+    @classmethod
+    def parse(cls, query: str) -> 'SavedSearch':
+        """
+        Parses the query: words of the title, `#tag`, `since:YYYY-MM-DD` and `until:YYYY-MM-DD`.
+        The until date includes the whole day.
+
+        Raises:
+            ValueError: if a date is not in the ISO format or there are several tags
+        """
+        words, tag, since, until = [], None, None, None
+        for word in query.split():
+            if word.startswith('#') and len(word) > 1:
+                if tag is not None:
+                    raise ValueError('A search can have only one tag')
+                tag = word[1:]
+            elif word.startswith('since:'):
+                since = datetime.fromisoformat(word[6:]).timestamp()
+            elif word.startswith('until:'):
+                until = datetime.fromisoformat(word[6:]).timestamp() + 24 * 60 * 60
+            else:
+                words.append(word)
+        return cls(query.strip(), ' '.join(words).lower(), tag, since, until)
+
+    def matches(self, data: 'UserData', title: str) -> bool:
+        if title in data.trash:
+            return False
+        if self.text and self.text not in title.lower():
+            return False
+        if self.tag is not None and self.tag not in data.tags.get(title, ()):
+            return False
+        modified = data.modified.get(title, 0.0)
+        return (self.since is None or self.since <= modified) and (self.until is None or modified < self.until)
+
+
+class SearchCache:
+    """
+    The SearchCache class keeps the results of the saved searches of a notebook.
+
+    Attributes:
+        _results: the generation the results were evaluated at and the matching titles, by the queries
+    """
+
+    def __init__(self) -> None:
+        self._results: Dict[str, Tuple[int, Set[str]]] = {}
+
+    def results(self, data: 'UserData', search: SavedSearch) -> Set[str]:
+        """
+        Returns the titles of the notes matching the search. The cached results are checked
+        by the generation of the notebook and updated with the notes changed since they were evaluated.
+        """
+        generation, titles = self._results.get(search.query, (-1, set()))
+        if generation != data.generation:
+            changed = data.changed_since(generation) if generation >= 0 else None
+            if changed is None:
+                titles = {title for title in data.history if search.matches(data, title)}
+            else:
+                for title in changed:
+                    if title in data.notes and search.matches(data, title):
+                        titles.add(title)
+                    else:
+                        titles.discard(title)
+            self._results[search.query] = (data.generation, titles)
+        return titles
+
+    def forget(self, query: str) -> None:
+        self._results.pop(query, None)
+
+    def clear(self) -> None:
+        self._results.clear()
@@ -0,0 +1,286 @@
+"""
+    A local read-only HTTP server over a notebook.
+
+    The index lists the titles of the notes page by page in the order of the history, and every note
+    has its own page. The notes in the trash are not served. The notebook is read from its files:
+    the server reloads it in a thread when the user data file or the trash log changes (e.g. the app dumps
+    the data or deletes a note), and keeps serving the previous snapshot until it is loaded.
+
+    ETag and Last-Modified headers are derived from the change stamps of the notes,
+    so a browser revalidating an unchanged page gets 304 Not Modified without the page being rendered.
+"""
+import asyncio
+import html
+import os
+from contextlib import suppress
+from email.utils import formatdate, parsedate_to_datetime
+from functools import lru_cache
+from http import HTTPStatus
+from typing import Callable, Dict, List, NamedTuple
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+from .memory import MemoryAccountant
+from .publish import PAGE, RENDER_VERSION, render_page
+from .user import TRASH_LOG_EXT, UserData
+
+
+PER_PAGE = 100
+MAX_PER_PAGE = 1000
+MAX_HEAD = 16 * 1024
+# GET and HEAD requests need no body, a larger one is rejected rather than read into memory
+MAX_BODY = 64 * 1024
+KEEP_ALIVE_TIMEOUT = 15
+# how often the file of the notebook is checked for changes, in seconds
+REFRESH_INTERVAL = 0.2
+INDEX_CACHE = 256
+
+
+class Response(NamedTuple):
+    status: int
+    headers: Dict[str, str]
+    body: bytes = b''
+
+
+def note_path(title: str) -> str:
+    return '/notes/' + quote(title, safe='')
+
+
+@lru_cache(maxsize=1024)
+def render_note(title: str, text: str) -> bytes:
+    return render_page(title, text, '/', note_path).encode()
+
+
+def render_index(name: str, titles: List[str], page: int, pages: int, per_page: int) -> str:
+    items = '\n'.join(f'<li><a href="{note_path(title)}">{html.escape(title)}</a></li>' for title in titles)
+    links = []
+    if page > 1:
+        links.append(f'<a href="/?page={page - 1}&amp;per_page={per_page}">Previous</a>')
+    links.append(f'page {page} of {pages}')
+    if page < pages:
+        links.append(f'<a href="/?page={page + 1}&amp;per_page={per_page}">Next</a>')
+    return PAGE.format(
+        title=html.escape(name),
+        body=f'<h1>{html.escape(name)}</h1>\n<ul>\n{items}\n</ul>\n<p>{" | ".join(links)}</p>',
+    )
+
+
+class NoteServer:
+    """
+    The NoteServer class serves a notebook over HTTP/1.1 with keep-alive connections.
+    Only GET and HEAD requests are accepted.
+
+    Attributes:
+        name: the name of the notebook
+        memory: the memory budget, or None if there is no budget
+        data: the last loaded snapshot of the notebook
+        _paths: the paths to the user data file and the trash log of the notebook
+        _mtime: the latest modification time of the files the snapshot was loaded from
+        _checked: the loop time the file was last checked at
+        _loading: the task loading a new snapshot, if there is one
+        _index_pages: the rendered pages of the index of the snapshot by their ETags
+    """
+
+    def __init__(self, name: str, data_root: str, memory: MemoryAccountant | None = None) -> None:
+        """
+        Args:
+            name: the name of the notebook
+            data_root: directory where the notebooks are stored
+            memory: the memory budget, it is checked as often as the file of the notebook.
+                The rendered pages are released when it is exceeded
+        """
+        self.name = name
+        self.memory = memory
+        path = os.path.abspath(os.path.join(data_root, name))
+        self._paths = (path + UserData._file_ext, path + TRASH_LOG_EXT)
+        self._mtime = self._stat()
+        self.data = UserData(name, data_root)
+        self._checked = 0.0
+        self._loading: asyncio.Task | None = None
+        self._index_pages: Dict[str, bytes] = {}
+        if memory:
+            memory.on_over_budget.append(self.release_caches)
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8000) -> asyncio.Server:
+        return await asyncio.start_server(self._handle, host, port, limit=MAX_HEAD)
+
+    def _stat(self) -> int | None:
+        mtimes = []
+        for path in self._paths:
+            try:
+                mtimes.append(os.stat(path).st_mtime_ns)
+            except FileNotFoundError:
+                pass
+        return max(mtimes, default=None)
+
+    def refresh(self) -> asyncio.Task | None:
+        """
+        Starts loading a new snapshot in a thread if the files of the notebook have changed.
+
+        Returns:
+            asyncio.Task | None: the loading task, or None if the snapshot is up to date
+        """
+        mtime = self._stat()
+        if mtime != self._mtime and self._loading is None:
+            self._loading = asyncio.create_task(self._load(mtime))
+        return self._loading
+
+    def release_caches(self) -> None:
+        """
+        Drops the rendered pages of the index and the notes, they are rendered again when they are requested.
+        """
+        self._index_pages.clear()
+        render_note.cache_clear()
+
+    async def _load(self, mtime: int | None) -> None:
+        try:
+            self.data = await asyncio.to_thread(UserData, self.name, os.path.dirname(self._paths[0]))
+            self._mtime = mtime
+            self._index_pages = {}
+        finally:
+            self._loading = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            keep_alive = True
+            while keep_alive:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), KEEP_ALIVE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._write(writer, 'HEAD', Response(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, {}), False)
+                    break
+
+                request_line, *header_lines = head[:-4].decode('latin-1').split('\r\n')
+                headers = {}
+                for line in header_lines:
+                    key, _, value = line.partition(':')
+                    headers[key.strip().lower()] = value.strip()
+                try:
+                    method, target, version = request_line.split()
+                    body_length = int(headers.get('content-length', 0))
+                    if body_length < 0:
+                        raise ValueError(body_length)
+                except ValueError:
+                    await self._write(writer, 'HEAD', Response(HTTPStatus.BAD_REQUEST, {}), False)
+                    break
+                if body_length > MAX_BODY:
+                    await self._write(writer, 'HEAD', Response(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {}), False)
+                    break
+                if body_length:
+                    try:
+                        await reader.readexactly(body_length)
+                    except asyncio.IncompleteReadError:
+                        break
+
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection == 'keep-alive' if version == 'HTTP/1.0' else connection != 'close'
+
+                if loop.time() - self._checked > REFRESH_INTERVAL:
+                    self._checked = loop.time()
+                    self.refresh()
+                    if self.memory:
+                        self.memory.keep_budget()
+                await self._write(writer, method, self.respond(method, target, headers), keep_alive)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            with suppress(ConnectionError):
+                await writer.wait_closed()
+
+    @staticmethod
+    async def _write(writer: asyncio.StreamWriter, method: str, response: Response, keep_alive: bool) -> None:
+        status = HTTPStatus(response.status)
+        head = [
+            f'HTTP/1.1 {status.value} {status.phrase}',
+            f'Content-Length: {len(response.body)}',
+            f'Connection: {"keep-alive" if keep_alive else "close"}',
+            *(f'{key}: {value}' for key, value in response.headers.items()),
+        ]
+        head = ('\r\n'.join(head) + '\r\n\r\n').encode('latin-1')
+        # one write per response, so it goes out in one send
+        if method != 'HEAD' and status != HTTPStatus.NOT_MODIFIED:
+            head += response.body
+        writer.write(head)
+        await writer.drain()
+
+    def respond(self, method: str, target: str, headers: Dict[str, str]) -> Response:
+        """
+        Returns the response to the request. The snapshot is not changed while it is made,
+        so the response is consistent even if a new snapshot is being loaded.
+
+        Arguments:
+            method: the method of the request
+            target: the path and the query of the request
+            headers: the headers of the request, their names in lower case
+        """
+        if method not in ('GET', 'HEAD'):
+            return Response(HTTPStatus.METHOD_NOT_ALLOWED, {'Allow': 'GET, HEAD'})
+
+        data = self.data
+        url = urlsplit(target)
+        if url.path == '/':
+            query = parse_qs(url.query)
+            try:
+                page = max(int(query.get('page', ['1'])[0]), 1)
+                per_page = min(max(int(query.get('per_page', [str(PER_PAGE)])[0]), 1), MAX_PER_PAGE)
+            except ValueError:
+                return Response(HTTPStatus.BAD_REQUEST, {})
+            # every change of the notes increases the generation, so it versions the whole list
+            etag = f'"i{RENDER_VERSION}-{data.generation}-{data.visible_count}-{page}-{per_page}"'
+            return self._conditional(headers, etag, (self._mtime or 0) / 1e9, lambda: self._index_page(
+                etag, data, page, per_page,
+            ))
+
+        if url.path.startswith('/notes/'):
+            title = unquote(url.path[len('/notes/'):])
+            if title in data.notes and title not in data.trash:
+                etag = f'"n{RENDER_VERSION}-{data.stamps.get(title, 0)}"'
+                modified = data.modified.get(title, (self._mtime or 0) / 1e9)
+                return self._conditional(headers, etag, modified, lambda: render_note(title, data.notes[title]))
+
+        return Response(HTTPStatus.NOT_FOUND, {'Content-Type': 'text/plain; charset=utf-8'}, b'Not Found')
+
+    def _index_page(self, etag: str, data: UserData, page: int, per_page: int) -> bytes:
+        if etag not in self._index_pages:
+            if len(self._index_pages) >= INDEX_CACHE:
+                self._index_pages.clear()
+            titles = [title for title in data.history if title not in data.trash] if data.trash else data.history
+            self._index_pages[etag] = render_index(
+                data.name,
+                titles[(page - 1) * per_page:page * per_page],
+                page,
+                max(-(-len(titles) // per_page), 1),
+                per_page,
+            ).encode()
+        return self._index_pages[etag]
+
+    @staticmethod
+    def _conditional(headers: Dict[str, str], etag: str, modified: float, render: Callable[[], bytes]) -> Response:
+        """
+        Returns 304 Not Modified if the validators of the request match, otherwise renders the page.
+        If-Modified-Since is checked only if the request has no If-None-Match.
+        """
+        validators = {'ETag': etag, 'Last-Modified': formatdate(modified, usegmt=True), 'Cache-Control': 'no-cache'}
+        if 'if-none-match' in headers:
+            tags = [tag.strip() for tag in headers['if-none-match'].split(',')]
+            if etag in tags or '*' in tags:
+                return Response(HTTPStatus.NOT_MODIFIED, validators)
+        elif 'if-modified-since' in headers:
+            with suppress(TypeError, ValueError):
+                if int(modified) <= parsedate_to_datetime(headers['if-modified-since']).timestamp():
+                    return Response(HTTPStatus.NOT_MODIFIED, validators)
+        return Response(
+            HTTPStatus.OK,
+            {'Content-Type': 'text/html; charset=utf-8', **validators},
+            render(),
+        )
+
+
+async def serve(name: str, data_root: str, host: str, port: int, memory: MemoryAccountant | None = None) -> None:
+    server = await NoteServer(name, data_root, memory).start(host, port)
+    address = server.sockets[0].getsockname()
+    print(f'Serving the notebook {name!r} on http://{address[0]}:{address[1]}/ (Ctrl-C to stop)', flush=True)
+    async with server:
+        await server.serve_forever()
@@ -2,10 +2,13 @@
     Factory functions that create Application instances (from the prompt-toolkit library) with unique features.
     They represent application windows containing certain functionality.
 """
+import os
+import time
 from prompt_toolkit.application import Application
 from prompt_toolkit.application.current import get_app
 from prompt_toolkit.buffer import Buffer
 from prompt_toolkit.document import Document
+from prompt_toolkit.filters import Condition
 from prompt_toolkit.formatted_text import HTML
 from prompt_toolkit.key_binding.key_bindings import KeyBindings
 from prompt_toolkit.layout import Layout, Dimension
@@ -28,19 +31,30 @@ from prompt_toolkit.widgets import (
     ValidationToolbar,
 )
 from typing import Callable
+from .markdown import MARKDOWN_STYLE, MarkdownLexer, wiki_link_at
+from .notebooks import Notebooks
+from .search import SavedSearch
 from .user import UserData
+from .widgets import NoteList
 
 
-def gallery(data: UserData, *args) -> Application:
+def gallery(data: UserData, note_num: int | None = None, *args) -> Application:
     """
     The function sets up a gallery user interface for the app.
-    If the user history is empty, a message is displayed with options to create a note or exit.
-    If the history is not empty, a list of notes is displayed with options to view, delete, create or exit.
+    If the user history is empty, a message is displayed with options to create a note, switch the notebook or exit.
+    If the history is not empty, a list of notes is displayed with options to view, delete, create,
+    switch the notebook or exit. The notes can be marked in the list to delete, tag or export them at once.
+    The list can be filtered by one of the saved searches, their cached results are reused while the notes
+    do not change. The saved searches are listed next to the notes, the active one is marked.
+    The notes in the trash are not listed.
 
-    Key bindings are set for different actions such as view, delete, create and exit.
+    Key bindings are set for different actions such as view, delete, tag, export, create, search, filter,
+    trash, undo the last deletion (of one note or a batch), switch the notebook and exit.
+    Delete works with the marked notes if there are any.
 
     Arguments:
         data: an instance of the UserData class containing user data.
+        note_num: the index of the note to select in the list, the first one is selected if it is None.
         *args: arguments that are not handled in any way
 
     Returns:
@@ -49,16 +63,38 @@ def gallery(data: UserData, *args) -> Application:
 
     kb = KeyBindings()
 
-    if not data.history:
+    if data.search not in data.searches:
+        data.search = None
+    if data.search is None:
+        listed = [(idx, title) for idx, title in enumerate(data.history) if title not in data.trash]
+    else:
+        found = data.search_cache.results(data, SavedSearch.parse(data.search))
+        listed = [(idx, title) for idx, title in enumerate(data.history) if title in found]
+
+    # Filter cycles through all notes and the saved searches in this order
+    search_lines = []
+    for query in [None, *data.searches]:
+        active = query == data.search
+        search_lines.append(('bold' if active else '', f'{">" if active else " "} {query or "All notes"}\n'))
+    searches = [Frame(Window(FormattedTextControl(search_lines)), title='Searches')] if data.searches else []
+
+    if not listed:
         body = HSplit(
             [
                 Window(
-                    FormattedTextControl('Your gallery is empty\nIt`s time to fill it up!'),
+                    FormattedTextControl(
+                        'Your gallery is empty\nIt`s time to fill it up!' if data.search is None
+                        else f'No notes match\n{data.search}'
+                    ),
                     height=2,
                     align=WindowAlign.CENTER,
                 ),
+                *searches,
                 Window(
-                    FormattedTextControl(HTML('<b><u>C</u></b>reate | <b><u>E</u></b>xit')),
+                    FormattedTextControl(HTML(
+                        ('<b><u>F</u></b>ilter | ' if data.search is not None else '')
+                        + ('tras<b><u>H</u></b> | <b><u>U</u></b>ndo | ' if data.trash else '')
+                        + '<b><u>C</u></b>reate | <b><u>N</u></b>otebooks | <b><u>E</u></b>xit')),
                     height=2,
                     align=WindowAlign.CENTER,
                 ),
@@ -67,17 +103,35 @@ def gallery(data: UserData, *args) -> Application:
             padding=1,
         )
     else:
+        status = ''
         body = HSplit(
             [
                 VSplit(
                     [
-                        note_list := RadioList([(idx, note) for idx, note in enumerate(data.history)]),
-                        Window(
-                            FormattedTextControl(HTML(
-                                '<DarkGray> Use the keys to move:</DarkGray>\n'
-                                'Up, Down, Page Up/Down')),
-                            height=2,
-                            align=WindowAlign.CENTER,
+                        note_list := NoteList(listed, data.marked, default=note_num),
+                        HSplit(
+                            [
+                                Window(
+                                    FormattedTextControl(HTML(
+                                        '<DarkGray> Use the keys to move:</DarkGray>\n'
+                                        'Up, Down, Page Up/Down')),
+                                    height=2,
+                                    align=WindowAlign.CENTER,
+                                ),
+                                Window(
+                                    FormattedTextControl(HTML(
+                                        '<DarkGray> and to mark:</DarkGray>\n'
+                                        '<b>Space</b>, <b><u>R</u></b>ange, <b><u>A</u></b>ll')),
+                                    height=2,
+                                    align=WindowAlign.CENTER,
+                                ),
+                                Window(
+                                    FormattedTextControl(lambda: f'Marked: {len(data.marked)}\n{status}'),
+                                    height=2,
+                                    align=WindowAlign.CENTER,
+                                ),
+                                *searches,
+                            ]
                         ),
                     ]
                 ),
@@ -89,12 +143,15 @@ def gallery(data: UserData, *args) -> Application:
                             align=WindowAlign.LEFT,
                         ),
                         Window(
-                            FormattedTextControl(HTML('<b><u>V</u></b>iew | <b><u>D</u></b>elete')),
+                            FormattedTextControl(HTML(
+                                '<b><u>V</u></b>iew | <b><u>D</u></b>elete | <b><u>T</u></b>ag | e<b><u>X</u></b>port'
+                                ' | <b><u>S</u></b>earch | <b><u>F</u></b>ilter | <b><u>N</u></b>otebooks')),
                             height=2,
                             align=WindowAlign.CENTER,
                         ),
                         Window(
-                            FormattedTextControl(HTML('<b><u>C</u></b>reate | <b><u>E</u></b>xit')),
+                            FormattedTextControl(HTML(
+                                'tras<b><u>H</u></b> | <b><u>U</u></b>ndo\n<b><u>C</u></b>reate | <b><u>E</u></b>xit')),
                             height=2,
                             align=WindowAlign.RIGHT,
                         )
@@ -110,12 +167,45 @@ def gallery(data: UserData, *args) -> Application:
 
         @ kb.add("d")
         def call_deleter(event) -> None:
-            event.app.exit(result=(deleter, note_list.current_value))
+            event.app.exit(result=(batch_deleter if data.marked else deleter, note_list.current_value))
+
+        @ kb.add("t", filter=Condition(lambda: bool(data.marked)))
+        def call_tagger(event) -> None:
+            event.app.exit(result=(tagger, note_list.current_value))
+
+        @ kb.add("x", filter=Condition(lambda: bool(data.marked)))
+        def export_marked(event) -> None:
+            nonlocal status
+            status = f'Exported to {os.path.basename(data.export_notes(data.marked))}'
+
+    @ kb.add("s", filter=Condition(lambda: bool(data.visible_count)))
+    def call_searcher(event) -> None:
+        event.app.exit(result=(searcher, note_num))
+
+    @ kb.add("f", filter=Condition(lambda: bool(data.searches)))
+    def next_filter(event) -> None:
+        filters = [None, *data.searches]
+        data.search = filters[(filters.index(data.search) + 1) % len(filters)]
+        event.app.exit(result=(gallery, None))
+
+    @ kb.add("h")
+    def call_trash(event) -> None:
+        event.app.exit(result=(trash, None))
+
+    @ kb.add("u", filter=Condition(lambda: bool(data.trash)))
+    def undo_deletion(event) -> None:
+        titles = set(data.last_deletion())
+        data.restore_notes(titles)
+        event.app.exit(result=(gallery, next(idx for idx, title in enumerate(data.history) if title in titles)))
 
     @ kb.add("c")
     def call_factory(event) -> None:
         event.app.exit(result=(factory, len(data.history)))
 
+    @ kb.add("n")
+    def call_picker(event) -> None:
+        event.app.exit(result=(picker, 0))
+
     @ kb.add("e")
     def exit(event) -> None:
         event.app.exit(result=(None, 0))
@@ -127,7 +217,11 @@ def gallery(data: UserData, *args) -> Application:
     })
 
     return Application(
-        layout=Layout(Dialog(title='NOTES', body=body, with_background=True)),
+        layout=Layout(Dialog(
+            title=f'NOTES: {data.name}' + (f' / {data.search}' if data.search is not None else ''),
+            body=body,
+            with_background=True,
+        )),
         full_screen=True,
         mouse_support=True,
         key_bindings=kb,
@@ -139,9 +233,11 @@ def view(data: UserData, note_num: int, *args) -> Application:
     """
     The function sets up an user interface for viewing a specific note.
     It displays the note's title and content along with options to edit, navigate to previous or next notes,
-    go back to the Gallery, or delete the note.
+    go back to the Gallery, or delete the note. The notes that link to this one are listed next to it.
 
     Key bindings are set up for different actions, such as navigating, editing, creating, and deleting.
+    Go follows the wiki link under the cursor (or the first link in its line), or the note selected
+    in the list of backlinks if the list has the focus (Tab moves the focus).
 
     Arguments:
         data: an instance of the UserData class containing user data.
@@ -152,6 +248,9 @@ def view(data: UserData, note_num: int, *args) -> Application:
         Application: an instance of the Application class with unique View sub-app settings.
     """
 
+    backlinks = sorted(title for title in data.links.backlinks(data.history[note_num]) if title not in data.trash)
+    backlink_list = RadioList([(title, title) for title in backlinks]) if backlinks else None
+
     body = HSplit(
         [
             Frame(
@@ -164,14 +263,16 @@ def view(data: UserData, note_num: int, *args) -> Application:
             ),
             VSplit(
                 [
-                    TextArea(
+                    text_area := TextArea(
                         text=data.notes[data.history[note_num]],
+                        lexer=MarkdownLexer(),
                         focus_on_click=True,
                         read_only=True,
                         wrap_lines=False,
                         width=Dimension(min=55),
                         height=Dimension(min=5),
-                    )
+                    ),
+                    *([Frame(backlink_list, title='Backlinks', width=Dimension(max=32))] if backlink_list else []),
                 ],
                 style='class:textarea'
             ),
@@ -179,7 +280,7 @@ def view(data: UserData, note_num: int, *args) -> Application:
                 [
                     Window(
                         FormattedTextControl(
-                            HTML('  Edit te<b><u>X</u></b>t / tit<b><u>L</u></b>e')
+                            HTML('  Edit te<b><u>X</u></b>t / tit<b><u>L</u></b>e | <b><u>G</u></b>o to link')
                         ),
                         width=Dimension(min=20),
                         ignore_content_width=True,
@@ -212,8 +313,9 @@ def view(data: UserData, note_num: int, *args) -> Application:
         ]
     )
 
-    next_note_num = note_num+1 if note_num != len(data.history)-1 else 0
-    prev_note_num = note_num-1 if note_num != 0 else len(data.history)-1
+    # the notes in the trash are skipped
+    next_note_num = data.neighbour(note_num, 1)
+    prev_note_num = data.neighbour(note_num, -1)
 
     kb = KeyBindings()
 
@@ -241,9 +343,24 @@ def view(data: UserData, note_num: int, *args) -> Application:
     def call_deleter(event) -> None:
         event.app.exit(result=(deleter, note_num))
 
+    @ kb.add("g")
+    def follow_link(event) -> None:
+        if backlink_list and event.app.layout.has_focus(backlink_list):
+            title = backlink_list.values[backlink_list._selected_index][0]
+        else:
+            document = text_area.document
+            title = wiki_link_at(document.current_line, document.cursor_position_col)
+        if title in data.notes and title not in data.trash:
+            event.app.exit(result=(view, data.history.index(title)))
+
+    @ kb.add("tab")
+    def focus_next(event) -> None:
+        event.app.layout.focus_next()
+
     custom_style = Style.from_dict({
         'window': 'bg:#FFDEAD #562800',
-        'textarea': 'bg:#DEB887 #562800'
+        'textarea': 'bg:#DEB887 #562800',
+        **MARKDOWN_STYLE,
     })
 
     return Application(
@@ -286,6 +403,7 @@ def editor(data: UserData, note_num: int, *args) -> Application:
                 [
                     text_area := TextArea(
                         text=data.notes[data.history[note_num]],
+                        lexer=MarkdownLexer(),
                         multiline=True,
                         wrap_lines=False,
                         focus_on_click=True,
@@ -324,7 +442,7 @@ def editor(data: UserData, note_num: int, *args) -> Application:
 
     @ kb.add("c-s")
     def exit_with_save(event) -> None:
-        data.notes[data.history[note_num]] = text_area.text
+        data.set_text(data.history[note_num], text_area.text)
         event.app.exit(result=(view, note_num))
 
     @ kb.add("escape")
@@ -343,7 +461,8 @@ def editor(data: UserData, note_num: int, *args) -> Application:
 
     custom_style = Style.from_dict({
         'window': 'bg:#A0522D #FFDEAD',
-        'textarea': 'bg:#DEB887 #562800'
+        'textarea': 'bg:#DEB887 #562800',
+        **MARKDOWN_STYLE,
     })
 
     return Application(
@@ -361,8 +480,8 @@ def deleter(data: UserData, note_num: int, calling_sub_app: Callable[..., Applic
     It displays a dialog with the note's title and a message asking the user to confirm the deletion.
     Two buttons, "OK" and "Cancel," are provided to handle the user's choice.
 
-    The function defines handlers for the button actions, including removing the note from the data,
-    and exiting the app.
+    The function defines handlers for the button actions, including moving the note to the trash,
+    and exiting the app. The note can be restored from the trash.
 
     Arguments:
         data: an instance of the UserData class containing user data.
@@ -374,12 +493,13 @@ def deleter(data: UserData, note_num: int, calling_sub_app: Callable[..., Applic
     """
 
     def ok_handler() -> None:
-        deleted_note = data.history.pop(note_num)
-        data.notes.pop(deleted_note)
-        if not data.history:
+        data.trash_notes([data.history[note_num]])
+        if not data.visible_count:
             result = (gallery, None)
         else:
-            result = (calling_sub_app, note_num if note_num == 0 else note_num-1)
+            # the previous note, or the next one if the deleted note was the first
+            neighbour = data.neighbour(note_num, -1, wrap=False)
+            result = (calling_sub_app, data.neighbour(note_num, 1) if neighbour is None else neighbour)
         get_app().exit(result=result)
 
     def cancel_handler() -> None:
@@ -393,7 +513,65 @@ def deleter(data: UserData, note_num: int, calling_sub_app: Callable[..., Applic
         body=HSplit(
             [
                 Label(
-                    text='Do you really want to delete this note?',
+                    text='Do you really want to move this note to the trash?',
+                    align=WindowAlign.CENTER
+                ),
+            ],
+            padding=Dimension(preferred=1, max=1),
+        ),
+        buttons=[cancel_button, ok_button],
+        with_background=True,
+    )
+
+    custom_style = Style.from_dict({
+        "dialog": "bg:#390606",
+        'dialog shadow': 'bg:#000000',
+        "dialog.body": "bg:#FFDEAD #7d0000",
+        'dialog frame.label': 'fg:#FFDEAD bg:#e70606',
+    })
+
+    return Application(
+        layout=Layout(dialog),
+        full_screen=True,
+        mouse_support=True,
+        style=custom_style
+    )
+
+
+def batch_deleter(data: UserData, note_num: int, *args) -> Application:
+    """
+    The function sets up an user interface for confirming the deletion of the notes marked in the gallery.
+    It displays a dialog with the number of the marked notes and a message asking the user to confirm the deletion.
+    Two buttons, "OK" and "Cancel," are provided to handle the user's choice.
+
+    The marked notes are moved to the trash, which takes time proportional to their number
+    whatever the size of the notebook.
+
+    Arguments:
+        data: an instance of the UserData class containing user data.
+        note_num: the index of the note selected in the gallery.
+        *args: arguments that are not handled in any way.
+
+    Returns:
+        Application: an instance of the Application class with unique Batch Deleter sub-app settings.
+    """
+
+    def ok_handler() -> None:
+        data.trash_notes(data.marked)
+        get_app().exit(result=(gallery, None))
+
+    def cancel_handler() -> None:
+        get_app().exit(result=(gallery, note_num))
+
+    ok_button = Button(text='OK', handler=ok_handler)
+    cancel_button = Button(text='Cancel', handler=cancel_handler)
+
+    dialog = Dialog(
+        title=f'{len(data.marked)} marked notes',
+        body=HSplit(
+            [
+                Label(
+                    text='Do you really want to move the marked notes to the trash?',
                     align=WindowAlign.CENTER
                 ),
             ],
@@ -440,8 +618,12 @@ def factory(data: UserData, note_num: int, calling_sub_app: Callable[..., Applic
             text = document.text
 
             conditions = {
+                'This title belongs to a note in the trash, restore or purge it first!': lambda: text in data.trash,
                 'The title of the note must be unique!': lambda: text in data.notes,
                 'The title of the note cannot be empty!': lambda: len(text) == 0,
+                # a link to a title ending with ] would end too early: [[draft]]] links to "draft"
+                'The title of the note cannot contain [[ or ]] or end with ]!':
+                    lambda: '[[' in text or ']]' in text or text.endswith(']'),
                 f'The title of the note should be more succinct (up to 62 characters, now {len(text)})':
                     lambda: 62 < len(text)
             }
@@ -453,13 +635,10 @@ def factory(data: UserData, note_num: int, calling_sub_app: Callable[..., Applic
         note_title = buffer.text
 
         if calling_sub_app == gallery:
-            data.history.append(note_title)
-            data.notes[note_title] = ''
+            data.add_note(note_title)
             result = (editor, note_num)
         else:
-            text_note = data.notes.pop(data.history[note_num])
-            data.notes[note_title] = text_note
-            data.history[note_num] = note_title
+            data.rename_note(note_num, note_title)
             result = (calling_sub_app, note_num)
         get_app().exit(result=result)
 
@@ -513,3 +692,477 @@ def factory(data: UserData, note_num: int, calling_sub_app: Callable[..., Applic
         mouse_support=True,
         style=custom_style
     )
+
+
+def tagger(data: UserData, note_num: int, *args) -> Application:
+    """
+    The function sets up an user interface for tagging the notes marked in the gallery.
+    It displays a dialog box with an input field for the tag.
+
+    Arguments:
+        data: an instance of the UserData class containing user data.
+        note_num: the index of the note selected in the gallery.
+        *args: arguments that are not handled in any way.
+
+    Returns:
+        Application: an instance of the Application class with unique Tagger sub-app settings.
+    """
+
+    class TagValidator(Validator):
+        def validate(self, document: Document) -> None:
+            text = document.text
+
+            conditions = {
+                'The tag cannot be empty!': lambda: len(text) == 0,
+                'The tag cannot contain spaces!': lambda: any(char.isspace() for char in text),
+                f'The tag should be more succinct (up to 30 characters, now {len(text)})': lambda: 30 < len(text)
+            }
+            for massage, condition in conditions.items():
+                if condition():
+                    raise ValidationError(message=massage, cursor_position=len(text))
+
+    def accept_handler(buffer: Buffer) -> None:
+        data.tag_notes(data.marked, buffer.text)
+        get_app().exit(result=(gallery, note_num))
+
+    def cancel_handler() -> None:
+        get_app().exit(result=(gallery, note_num))
+
+    cancel_button = Button(text='Cancel', handler=cancel_handler)
+
+    dialog = Dialog(
+        title=f'Enter a tag for {len(data.marked)} marked notes',
+        body=HSplit(
+            [
+                TextArea(
+                    multiline=False,
+                    focus_on_click=True,
+                    validator=TagValidator(),
+                    accept_handler=accept_handler
+                ),
+                ValidationToolbar(),
+            ],
+            padding=Dimension(preferred=1, max=1),
+        ),
+        buttons=[cancel_button],
+        with_background=True,
+    )
+
+    custom_style = Style.from_dict({
+        'dialog': 'bg:#DEB887',
+        'dialog shadow': 'bg:#000000',
+        'dialog.body': 'bg:#FFDEAD #562800',
+        'dialog frame.label': 'fg:#FFDEAD bg:#562800',
+    })
+
+    return Application(
+        layout=Layout(dialog),
+        full_screen=True,
+        mouse_support=True,
+        style=custom_style
+    )
+
+
+def searcher(data: UserData, note_num: int | None, *args) -> Application:
+    """
+    The function sets up an user interface for saving a search and filtering the gallery by it.
+    It displays a dialog box with an input field for the query: words of the title, a #tag,
+    since:YYYY-MM-DD and until:YYYY-MM-DD. If the gallery is filtered, the search can be forgotten.
+
+    Arguments:
+        data: an instance of the UserData class containing user data.
+        note_num: the index of the note selected in the gallery.
+        *args: arguments that are not handled in any way.
+
+    Returns:
+        Application: an instance of the Application class with unique Searcher sub-app settings.
+    """
+
+    class SearchValidator(Validator):
+        def validate(self, document: Document) -> None:
+            text = document.text
+
+            if not text.strip():
+                raise ValidationError(message='The search cannot be empty!', cursor_position=len(text))
+            if 62 < len(text):
+                raise ValidationError(
+                    message=f'The search should be more succinct (up to 62 characters, now {len(text)})',
+                    cursor_position=len(text),
+                )
+            try:
+                SavedSearch.parse(text)
+            except ValueError as error:
+                raise ValidationError(message=f'{error}!', cursor_position=len(text))
+
+    def accept_handler(buffer: Buffer) -> None:
+        query = SavedSearch.parse(buffer.text).query
+        if query not in data.searches:
+            data.searches.append(query)
+        data.search = query
+        get_app().exit(result=(gallery, None))
+
+    def forget_handler() -> None:
+        data.searches.remove(data.search)
+        data.search_cache.forget(data.search)
+        data.search = None
+        get_app().exit(result=(gallery, None))
+
+    def cancel_handler() -> None:
+        get_app().exit(result=(gallery, note_num))
+
+    buttons = [Button(text='Cancel', handler=cancel_handler)]
+    if data.search is not None:
+        buttons.append(Button(text='Forget', handler=forget_handler))
+
+    dialog = Dialog(
+        title='Enter a search: words #tag since:YYYY-MM-DD until:YYYY-MM-DD',
+        body=HSplit(
+            [
+                TextArea(
+                    multiline=False,
+                    focus_on_click=True,
+                    validator=SearchValidator(),
+                    accept_handler=accept_handler
+                ),
+                ValidationToolbar(),
+            ],
+            padding=Dimension(preferred=1, max=1),
+        ),
+        buttons=buttons,
+        with_background=True,
+    )
+
+    custom_style = Style.from_dict({
+        'dialog': 'bg:#DEB887',
+        'dialog shadow': 'bg:#000000',
+        'dialog.body': 'bg:#FFDEAD #562800',
+        'dialog frame.label': 'fg:#FFDEAD bg:#562800',
+    })
+
+    return Application(
+        layout=Layout(dialog),
+        full_screen=True,
+        mouse_support=True,
+        style=custom_style
+    )
+
+
+def trash(data: UserData, *args) -> Application:
+    """
+    The function sets up an user interface for the trash: the deleted notes, the most recently deleted first.
+    If the trash is empty, a message is displayed with an option to go back to the gallery.
+    Otherwise the notes can be restored, or the trash can be emptied after a confirmation.
+
+    The notes stay in the trash until it is compacted when the notebook is opened again: the old notes,
+    and the oldest ones when it holds too many notes, are removed for good on the way to the gallery.
+
+    Arguments:
+        data: an instance of the UserData class containing user data.
+        *args: arguments that are not handled in any way.
+
+    Returns:
+        Application: an instance of the Application class with unique Trash sub-app settings.
+    """
+
+    kb = KeyBindings()
+
+    if not data.trash:
+        body = HSplit(
+            [
+                Window(
+                    FormattedTextControl('The trash is empty'),
+                    height=2,
+                    align=WindowAlign.CENTER,
+                ),
+                Window(
+                    FormattedTextControl(HTML('<b><u>B</u></b>ack')),
+                    height=2,
+                    align=WindowAlign.CENTER,
+                ),
+            ],
+            padding_char='-',
+            padding=1,
+        )
+    else:
+        body = HSplit(
+            [
+                trash_list := RadioList([
+                    (title, f'{title}  (deleted {time.strftime("%Y-%m-%d %H:%M", time.localtime(deleted))})')
+                    for title, deleted in reversed(data.trash.items())
+                ]),
+                VSplit(
+                    [
+                        Window(
+                            FormattedTextControl(HTML('<b><u>R</u></b>estore')),
+                            height=2,
+                            align=WindowAlign.LEFT,
+                        ),
+                        Window(
+                            FormattedTextControl(HTML('<b><u>P</u></b>urge all')),
+                            height=2,
+                            align=WindowAlign.CENTER,
+                        ),
+                        Window(
+                            FormattedTextControl(HTML('<b><u>B</u></b>ack')),
+                            height=2,
+                            align=WindowAlign.RIGHT,
+                        )
+                    ]
+                )
+            ],
+            padding_char='-', padding=1,
+        )
+
+        @ kb.add("r")
+        def restore(event) -> None:
+            data.restore_notes([trash_list.values[trash_list._selected_index][0]])
+            event.app.exit(result=(trash, None))
+
+        @ kb.add("p")
+        def call_purger(event) -> None:
+            event.app.exit(result=(purger, None))
+
+    @ kb.add("b")
+    def call_gallery(event) -> None:
+        event.app.exit(result=(gallery, None))
+
+    custom_style = Style.from_dict({
+        'dialog': 'bg:#DEB887',
+        'dialog.body': 'bg:#FFDEAD #562800',
+        'dialog frame.label': 'fg:#FFDEAD bg:#562800',
+    })
+
+    return Application(
+        layout=Layout(Dialog(title=f'TRASH: {data.name}', body=body, with_background=True)),
+        full_screen=True,
+        mouse_support=True,
+        key_bindings=kb,
+        style=custom_style
+    )
+
+
+def purger(data: UserData, *args) -> Application:
+    """
+    The function sets up an user interface for confirming the purge of the trash.
+    It displays a dialog with the number of the notes in the trash and a message asking the user to confirm
+    the purge. Two buttons, "OK" and "Cancel," are provided to handle the user's choice.
+
+    The purged notes are removed for good, unlike the deleted ones it cannot be undone.
+
+    Arguments:
+        data: an instance of the UserData class containing user data.
+        *args: arguments that are not handled in any way.
+
+    Returns:
+        Application: an instance of the Application class with unique Purger sub-app settings.
+    """
+
+    def ok_handler() -> None:
+        data.compact_trash(everything=True)
+        get_app().exit(result=(gallery, None))
+
+    def cancel_handler() -> None:
+        get_app().exit(result=(trash, None))
+
+    ok_button = Button(text='OK', handler=ok_handler)
+    cancel_button = Button(text='Cancel', handler=cancel_handler)
+
+    dialog = Dialog(
+        title=f'{len(data.trash)} notes in the trash',
+        body=HSplit(
+            [
+                Label(
+                    text='Do you really want to remove the notes in the trash for good? It cannot be undone.',
+                    align=WindowAlign.CENTER
+                ),
+            ],
+            padding=Dimension(preferred=1, max=1),
+        ),
+        buttons=[cancel_button, ok_button],
+        with_background=True,
+    )
+
+    custom_style = Style.from_dict({
+        "dialog": "bg:#390606",
+        'dialog shadow': 'bg:#000000',
+        "dialog.body": "bg:#FFDEAD #7d0000",
+        'dialog frame.label': 'fg:#FFDEAD bg:#e70606',
+    })
+
+    return Application(
+        layout=Layout(dialog),
+        full_screen=True,
+        mouse_support=True,
+        style=custom_style
+    )
+
+
+def picker(notebooks: Notebooks, *args) -> Application:
+    """
+    The function sets up an user interface for choosing a notebook. It is shown before the gallery.
+    If there are no notebooks, a message is displayed with options to create a notebook or exit.
+    Otherwise a list of notebooks is displayed with options to open, create or exit.
+
+    Key bindings are set for different actions such as open, create and exit.
+
+    Arguments:
+        notebooks: an instance of the Notebooks class containing the notebooks of the user.
+        *args: arguments that are not handled in any way
+
+    Returns:
+        Application: an instance of the Application class with unique Picker sub-app settings.
+    """
+
+    kb = KeyBindings()
+    names = notebooks.names()
+
+    if not names:
+        body = HSplit(
+            [
+                Window(
+                    FormattedTextControl('You have no notebooks\nIt`s time to create one!'),
+                    height=2,
+                    align=WindowAlign.CENTER,
+                ),
+                Window(
+                    FormattedTextControl(HTML('<b><u>C</u></b>reate | <b><u>E</u></b>xit')),
+                    height=2,
+                    align=WindowAlign.CENTER,
+                ),
+            ],
+            padding_char='-',
+            padding=1,
+        )
+    else:
+        try:
+            active_name = notebooks.active.name
+        except LookupError:
+            active_name = None
+
+        body = HSplit(
+            [
+                notebook_list := RadioList(
+                    [(name, name) for name in names],
+                    default=active_name,
+                ),
+                VSplit(
+                    [
+                        Window(
+                            FormattedTextControl(HTML('<b>Enter</b> or <b>click</b> to select')),
+                            height=2,
+                            align=WindowAlign.LEFT,
+                        ),
+                        Window(
+                            FormattedTextControl(HTML('<b><u>O</u></b>pen')),
+                            height=2,
+                            align=WindowAlign.CENTER,
+                        ),
+                        Window(
+                            FormattedTextControl(HTML('<b><u>C</u></b>reate | <b><u>E</u></b>xit')),
+                            height=2,
+                            align=WindowAlign.RIGHT,
+                        )
+                    ]
+                )
+            ],
+            padding_char='-', padding=1,
+        )
+
+        @ kb.add("o")
+        def open_notebook(event) -> None:
+            notebooks.switch(notebook_list.current_value)
+            event.app.exit(result=(gallery, 0))
+
+    @ kb.add("c")
+    def call_notebook_factory(event) -> None:
+        event.app.exit(result=(notebook_factory, 0))
+
+    @ kb.add("e")
+    def exit(event) -> None:
+        event.app.exit(result=(None, 0))
+
+    custom_style = Style.from_dict({
+        'dialog': 'bg:#DEB887',
+        'dialog.body': 'bg:#FFDEAD #562800',
+        'dialog frame.label': 'fg:#FFDEAD bg:#562800',
+    })
+
+    return Application(
+        layout=Layout(Dialog(title='NOTEBOOKS', body=body, with_background=True)),
+        full_screen=True,
+        mouse_support=True,
+        key_bindings=kb,
+        style=custom_style
+    )
+
+
+def notebook_factory(notebooks: Notebooks, *args) -> Application:
+    """
+    The function sets up an user interface for creating a notebook.
+    It displays a dialog box with an input field for the name of the notebook.
+    The created notebook becomes active and the gallery is shown.
+
+    Arguments:
+        notebooks: an instance of the Notebooks class containing the notebooks of the user.
+        *args: arguments that are not handled in any way
+
+    Returns:
+        Application: an instance of the Application class with unique Notebook Factory sub-app settings.
+    """
+
+    class NotebookValidator(Validator):
+        def validate(self, document: Document) -> None:
+            text = document.text
+
+            conditions = {
+                'The name of the notebook must be unique!': lambda: text in notebooks.names(),
+                'The name of the notebook cannot be empty!': lambda: len(text) == 0,
+                'The name of the notebook cannot contain slashes or start with a dot!':
+                    lambda: '/' in text or '\\' in text or text.startswith('.'),
+                f'The name of the notebook should be more succinct (up to 62 characters, now {len(text)})':
+                    lambda: 62 < len(text)
+            }
+            for massage, condition in conditions.items():
+                if condition():
+                    raise ValidationError(message=massage, cursor_position=len(text))
+
+    def accept_handler(buffer: Buffer) -> None:
+        notebooks.switch(buffer.text)
+        get_app().exit(result=(gallery, 0))
+
+    def cancel_handler() -> None:
+        get_app().exit(result=(picker, 0))
+
+    cancel_button = Button(text='Cancel', handler=cancel_handler)
+
+    dialog = Dialog(
+        title='Enter a notebook name',
+        body=HSplit(
+            [
+                TextArea(
+                    multiline=False,
+                    focus_on_click=True,
+                    validator=NotebookValidator(),
+                    accept_handler=accept_handler
+                ),
+                ValidationToolbar(),
+            ],
+            padding=Dimension(preferred=1, max=1),
+        ),
+        buttons=[cancel_button],
+        with_background=True,
+    )
+
+    custom_style = Style.from_dict({
+        'dialog': 'bg:#DEB887',
+        'dialog shadow': 'bg:#000000',
+        'dialog.body': 'bg:#FFDEAD #562800',
+        'dialog frame.label': 'fg:#FFDEAD bg:#562800',
+    })
+
+    return Application(
+        layout=Layout(dialog),
+        full_screen=True,
+        mouse_support=True,
+        style=custom_style
+    )
@@ -1,6 +1,22 @@
+import json
 import os
 import pickle
-from typing import Dict, List
+import time
+from bisect import bisect_right
+from operator import itemgetter
+from typing import Dict, Iterable, List, Set, Tuple
+from .links import LinkIndex
+from .markdown import rename_wiki_links
+from .search import SearchCache
+
+
+DATA_ROOT = 'application/data/'
+# the trash is compacted when it holds more notes than the limit or its oldest note is older than the age.
+# It is checked once per opening of the notebook, and the notes deleted since then are purged only by the age
+TRASH_LIMIT = 100
+TRASH_AGE = 30 * 24 * 60 * 60
+# the extension of the trash log, it is kept next to the user data file
+TRASH_LOG_EXT = '.trash'
 
 
 class UserData:
@@ -9,42 +25,373 @@ class UserData:
     It provides methods for loading and dumping data to/from a pickle file.
 
     Attributes:
+        name: the name of the notebook (the file name of the user data)
         history: contains a sequence of titles of notes created by the user.
         notes: contains title and text information
+        tags: contains the tags of the notes by their titles
+        generation: the number of changes of the notes, it only grows
+        stamps: the generation of the last change of each note by its title
+        modified: the time of the last change of each note by its title
+        searches: the queries of the saved searches
+        trash: the deletion time of each deleted note by its title, the most recently deleted last.
+            A deleted note stays in the history and the notes until the trash is compacted
+        marked: titles of the notes marked in the gallery for batch operations (it is not dumped)
+        search: the query of the saved search the gallery is filtered by (it is not dumped)
+        search_cache: the cached results of the saved searches (it is not dumped)
         _file_ext: data file extension
         _filedir: directory where user data is stored
         _abspath: full path to the user data file
+        _changes: the generations and the titles of the changes made since the data was loaded
+        _first_generation: the generation the data was loaded at
+        _opened: the time the data was loaded at
+        _trash_checked: whether the trash has been checked for compaction since the data was loaded
+        _dumped_generation: the generation the data was last dumped or loaded at
+        _links: the index of the wiki links between the notes, it is built on first use (it is not dumped)
     """
 
     _file_ext = '.pickle'
-    _filedir = 'application/data/'
+    _filedir = DATA_ROOT
     # create a directory with user data files
     os.makedirs(os.path.dirname(_filedir), exist_ok=True)
 
-    def __init__(self, filename='userdata') -> None:
+    def __init__(self, filename='userdata', filedir: str | None = None) -> None:
         """
         Loads data from the pickle file specified in the filename.
         If the file does not exist, the values are set by default
 
         Args:
             filename: file name (specified without a path and without an extension)
+            filedir: directory with the file, the default one is used if it is not specified
         """
+        self.name = filename
         self.history: List[str] = []
         self.notes: Dict[str, str] = {}
-        self._abspath = os.path.abspath(self._filedir + filename + self._file_ext)
+        self.tags: Dict[str, Set[str]] = {}
+        self.generation = 0
+        self.stamps: Dict[str, int] = {}
+        self.modified: Dict[str, float] = {}
+        self.searches: List[str] = []
+        self.trash: Dict[str, float] = {}
+        self.marked: Set[str] = set()
+        self.search: str | None = None
+        self.search_cache = SearchCache()
+        self._abspath = os.path.abspath(os.path.join(filedir or self._filedir, filename + self._file_ext))
 
         try:
             with open(self._abspath, 'rb') as file:
                 self.history = pickle.load(file)
                 self.notes = pickle.load(file)
-        except FileNotFoundError:
+                # the files dumped before the tags were introduced end here
+                self.tags = pickle.load(file)
+                # and here, before the change stamps were introduced
+                self.generation, self.stamps, self.modified = pickle.load(file)
+                self.searches = pickle.load(file)
+                self.trash = pickle.load(file)
+        except (FileNotFoundError, EOFError):
             pass
+        self._changes: List[Tuple[int, str]] = []
+        self._links: LinkIndex | None = None
+        self._dumped_generation = self.generation
+        self._replay_trash_log()
+        self._first_generation = self.generation
+        self._opened = time.time()
+        self._trash_checked = False
+
+    @property
+    def links(self) -> LinkIndex:
+        """
+        The index of the wiki links. It is built from all the notes the first time it is needed
+        and is kept up to date by the methods that change the notes.
+        """
+        if self._links is None:
+            self._links = LinkIndex(self.notes.items())
+        return self._links
 
     def dump_data(self) -> None:
         """
-        Dumps the history and notes data to a pickle file specified by abspath.
+        Dumps the history, notes, tags, change stamps, saved searches and trash to a pickle file specified by abspath.
         If the file doesn't exist, it will be created.
+        The data is written to a temporary file that replaces the old one, so the file is never left half-written.
+        The trash log is emptied afterwards: the dumped trash includes it.
         """
-        with open(self._abspath, 'wb') as file:
+        tmp_path = self._abspath + '.tmp'
+        with open(tmp_path, 'wb') as file:
             pickle.dump(self.history, file)
             pickle.dump(self.notes, file)
+            pickle.dump(self.tags, file)
+            pickle.dump((self.generation, self.stamps, self.modified), file)
+            pickle.dump(self.searches, file)
+            pickle.dump(self.trash, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self._abspath)
+        self._dumped_generation = self.generation
+        try:
+            os.remove(self._trash_log_path())
+        except FileNotFoundError:
+            pass
+
+    def release_caches(self) -> None:
+        """
+        Drops the cached results of the saved searches and the index of the wiki links,
+        they are evaluated and built again when they are needed.
+        """
+        self.search_cache.clear()
+        self._links = None
+
+    @property
+    def changed(self) -> bool:
+        """
+        Whether the notes have changed since the data was last dumped or loaded.
+        """
+        return self.generation != self._dumped_generation
+
+    def add_note(self, title: str) -> None:
+        """
+        Adds an empty note to the end of the history.
+        """
+        self.history.append(title)
+        self.notes[title] = ''
+        self.touch([title])
+
+    def set_text(self, title: str, text: str) -> None:
+        """
+        Changes the text of the note and updates the links of the note in the link index.
+        """
+        if self.notes[title] == text:
+            return
+        self.notes[title] = text
+        if self._links is not None:
+            self._links.update(title, text)
+        self.touch([title])
+
+    def rename_note(self, note_num: int, title: str) -> None:
+        """
+        Renames the note and rewrites the wiki links to it in the notes that link to it.
+        Only the notes the link index lists as referrers are rewritten, and only their links:
+        the same text in code spans and code fences is kept.
+
+        Args:
+            note_num: the index of the note in the history
+            title: the new title
+        """
+        old_title = self.history[note_num]
+        self.history[note_num] = title
+        self.notes[title] = self.notes.pop(old_title)
+        if old_title in self.tags:
+            self.tags[title] = self.tags.pop(old_title)
+        if old_title in self.marked:
+            self.marked.remove(old_title)
+            self.marked.add(title)
+
+        referrers = self.links.rename(old_title, title)
+        for referrer in referrers:
+            self.notes[referrer] = rename_wiki_links(self.notes[referrer], old_title, title)
+        self.touch([old_title, title, *referrers])
+
+    @property
+    def visible_count(self) -> int:
+        """
+        The number of the notes that are not in the trash.
+        """
+        return len(self.history) - len(self.trash)
+
+    def neighbour(self, note_num: int, step: int, wrap: bool = True) -> int | None:
+        """
+        Returns the index of the nearest note that is not in the trash, going from the note by the step
+        (and wrapping around the history), or None if there is no such note.
+        """
+        for distance in range(1, len(self.history) + 1):
+            idx = note_num + step * distance
+            if not wrap and not 0 <= idx < len(self.history):
+                return None
+            if self.history[idx % len(self.history)] not in self.trash:
+                return idx % len(self.history)
+        return None
+
+    def trash_notes(self, titles: Iterable[str]) -> None:
+        """
+        Moves the notes to the trash. It takes time proportional to the number of the notes moved:
+        they leave tombstones in the trash, and the tombstones are appended to the trash log
+        instead of dumping all the data.
+
+        Args:
+            titles: titles of the notes to move to the trash
+        """
+        self._log_trash('trash', [title for title in titles if title not in self.trash], time.time())
+
+    def last_deletion(self) -> List[str]:
+        """
+        Returns the titles of the notes in the trash that were moved to it by the last deletion,
+        e.g. all the marked notes of a batch. The notes of one deletion share the deletion time.
+        """
+        titles: List[str] = []
+        for title, deleted in reversed(self.trash.items()):
+            if titles and deleted != self.trash[titles[0]]:
+                break
+            titles.append(title)
+        return titles[::-1]
+
+    def restore_notes(self, titles: Iterable[str]) -> None:
+        """
+        Restores the notes from the trash.
+
+        Args:
+            titles: titles of the notes to restore
+        """
+        self._log_trash('restore', [title for title in titles if title in self.trash], time.time())
+
+    def compact_trash(self, everything: bool = False) -> bool:
+        """
+        Removes the notes from the trash for good if they are older than TRASH_AGE or the trash holds
+        more notes than TRASH_LIMIT, and dumps the data.
+
+        The trash is checked only the first time it is called after the data is loaded, so the notes
+        that age or overflow meanwhile are removed together on the next opening: the history is rewritten
+        and the data is dumped at most once per opening, whatever the number of the deletions.
+        The notes deleted since the data was loaded are not removed for the limit, so a mistaken deletion
+        can always be undone.
+
+        Args:
+            everything: remove all the notes from the trash regardless of the limits
+
+        Returns:
+            bool: whether the trash was compacted
+        """
+        if not everything:
+            if self._trash_checked:
+                return False
+            self._trash_checked = True
+        deadline = time.time() - TRASH_AGE
+        overflow = len(self.trash) - TRASH_LIMIT
+        purged = []
+        # the trash is ordered by the deletion time, so the notes to remove are at its start
+        for idx, (title, deleted) in enumerate(self.trash.items()):
+            if not (everything or deleted <= deadline or idx < overflow and deleted < self._opened):
+                break
+            purged.append(title)
+        if not purged:
+            return False
+
+        titles = set(purged)
+        self.history[:] = [title for title in self.history if title not in titles]
+        for title in purged:
+            del self.trash[title]
+            self.notes.pop(title, None)
+            self.tags.pop(title, None)
+            if self._links is not None:
+                self._links.remove(title)
+        self.touch(purged)
+        self.dump_data()
+        return True
+
+    def _trash_log_path(self) -> str:
+        return os.path.splitext(self._abspath)[0] + TRASH_LOG_EXT
+
+    def _log_trash(self, action: str, titles: List[str], when: float, replay: bool = False) -> None:
+        """
+        Moves the notes to the trash or restores them, and appends the change to the trash log
+        unless it is replayed from the log. If the data was dumped before the change, it stays dumped:
+        the log keeps the change until the next dump.
+        """
+        if not titles:
+            return
+        dumped = not self.changed
+        for title in titles:
+            if action == 'trash':
+                self.trash[title] = when
+                self.marked.discard(title)
+            else:
+                self.trash.pop(title)
+        self.touch(titles, modify=False)
+
+        if not replay:
+            with open(self._trash_log_path(), 'a', encoding='utf-8') as file:
+                file.write(json.dumps([action, titles, when]) + '\n')
+                file.flush()
+                os.fsync(file.fileno())
+        if dumped:
+            self._dumped_generation = self.generation
+
+    def _replay_trash_log(self) -> None:
+        try:
+            with open(self._trash_log_path(), encoding='utf-8') as file:
+                lines = file.readlines()
+        except FileNotFoundError:
+            return
+        for line in lines:
+            try:
+                action, titles, when = json.loads(line)
+            except ValueError:
+                # the last line may be cut short by a crash
+                break
+            if action == 'trash':
+                titles = [title for title in titles if title in self.notes and title not in self.trash]
+            else:
+                titles = [title for title in titles if title in self.trash]
+            self._log_trash(action, titles, when, replay=True)
+
+    def tag_notes(self, titles: Iterable[str], tag: str) -> None:
+        """
+        Adds the tag to the notes.
+
+        Args:
+            titles: titles of the notes to tag
+            tag: the tag
+        """
+        titles = list(titles)
+        for title in titles:
+            self.tags.setdefault(title, set()).add(tag)
+        self.touch(titles)
+
+    def touch(self, titles: Iterable[str], modify: bool = True) -> None:
+        """
+        Records a change of the notes: the generation is increased and the notes are stamped with it.
+        It must be called after every change of the notes, including the creation, renaming and deletion,
+        so the cached results of the searches are checked and updated.
+
+        Args:
+            titles: titles of the changed notes. The old title of a renamed note and the titles
+                of the deleted notes are included too
+            modify: whether the modification time of the notes is updated. Moving a note to the trash
+                and back does not modify it
+        """
+        self.generation += 1
+        now = time.time()
+        for title in titles:
+            if title in self.notes:
+                self.stamps[title] = self.generation
+                if modify:
+                    self.modified[title] = now
+            else:
+                self.stamps.pop(title, None)
+                self.modified.pop(title, None)
+            self._changes.append((self.generation, title))
+
+    def changed_since(self, generation: int) -> Set[str] | None:
+        """
+        Returns the titles of the notes changed after the generation,
+        or None if the changes are not known because they were made before the data was loaded.
+        """
+        if generation < self._first_generation:
+            return None
+        start = bisect_right(self._changes, generation, key=itemgetter(0))
+        return {title for _, title in self._changes[start:]}
+
+    def export_notes(self, titles: Iterable[str]) -> str:
+        """
+        Exports the notes in the order of the history to a Markdown file next to the user data file.
+
+        Args:
+            titles: titles of the notes to export
+
+        Returns:
+            str: the path to the exported file
+        """
+        titles = set(titles)
+        path = os.path.splitext(self._abspath)[0] + '-export.md'
+        with open(path, 'w') as file:
+            file.write('\n'.join(
+                f'# {title}\n\n{self.notes[title]}\n' for title in self.history if title in titles
+            ))
+        return path
@@ -0,0 +1,62 @@
+from prompt_toolkit.formatted_text import StyleAndTextTuples
+from prompt_toolkit.key_binding.key_bindings import KeyBindings, merge_key_bindings
+from prompt_toolkit.widgets import RadioList
+from typing import Callable, Sequence, Set, Tuple
+
+
+class NoteList(RadioList):
+    """
+    The NoteList class is a list of notes in which the notes can be marked for batch operations.
+    Like in RadioList, Enter or a click selects the note under the cursor.
+
+    Key bindings are added for marking: Space marks (or unmarks) the note under the cursor,
+    R marks the notes from the last marked one to the cursor, A marks all the listed notes
+    or unmarks them if all of them are marked.
+
+    Attributes:
+        marked: the titles of the marked notes. The set is shared with the caller, so the marks
+            outlive the list (it is rebuilt every time the gallery is shown)
+        _titles: the titles of the listed notes
+        _anchor: the position of the note marked last
+    """
+
+    def __init__(self, notes: Sequence[Tuple[int, str]], marked: Set[str], default: int | None = None) -> None:
+        """
+        Args:
+            notes: pairs of the index of a note in the history and its title
+            marked: the titles of the marked notes
+            default: the index of the selected note
+        """
+        self.marked = marked
+        self._titles = [title for _, title in notes]
+        self._anchor = 0
+        super().__init__([(idx, self._label(title)) for idx, title in notes], default=default)
+
+        kb = KeyBindings()
+
+        @ kb.add(" ")
+        def mark(event) -> None:
+            title = self._titles[self._selected_index]
+            if title in self.marked:
+                self.marked.remove(title)
+            else:
+                self.marked.add(title)
+            self._anchor = self._selected_index
+
+        @ kb.add("r")
+        def mark_range(event) -> None:
+            start, end = sorted((self._anchor, self._selected_index))
+            self.marked.update(self._titles[start:end+1])
+            self._anchor = self._selected_index
+
+        @ kb.add("a")
+        def mark_all(event) -> None:
+            if self.marked.issuperset(self._titles):
+                self.marked.difference_update(self._titles)
+            else:
+                self.marked.update(self._titles)
+
+        self.control.key_bindings = merge_key_bindings([self.control.key_bindings, kb])
+
+    def _label(self, title: str) -> Callable[[], StyleAndTextTuples]:
+        return lambda: [('class:note-list.mark', '+ ' if title in self.marked else '  '), ('', title)]
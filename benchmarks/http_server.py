@@ -0,0 +1,148 @@
+"""
+    Measures the throughput of `mynotes serve` against a local client.
+
+    The server runs in its own process over a synthetic notebook, and the client opens many concurrent
+    connections from an asyncio loop. Every connection sends its requests one after another: index pages
+    and notes picked at random. Three scenarios are measured:
+
+        keep-alive      all requests of a connection go over one persistent connection
+        close           every request opens a new connection
+        revalidate      keep-alive requests with If-None-Match, answered with 304 Not Modified
+
+    Run:
+        python -m benchmarks.http_server [--notes 10000] [--connections 50] [--requests 200]
+"""
+import argparse
+import asyncio
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+from urllib.parse import quote
+from .load_test import NOTEBOOK, make_notebook
+
+
+def start_server(data_root: str) -> Tuple[subprocess.Popen, str, int]:
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'application.scripts.run', '--data-root', data_root,
+         'serve', '--notebook', NOTEBOOK, '--port', '0'],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    # Serving the notebook 'load-test' on http://127.0.0.1:PORT/ (Ctrl-C to stop)
+    address = process.stdout.readline().split('http://')[1].split('/')[0]
+    host, port = address.rsplit(':', 1)
+    return process, host, int(port)
+
+
+async def request(
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+    path: str,
+    headers: Dict[str, str],
+) -> Tuple[int, Dict[str, str]]:
+    writer.write(
+        f'GET {path} HTTP/1.1\r\nHost: localhost\r\n'.encode()
+        + ''.join(f'{key}: {value}\r\n' for key, value in headers.items()).encode()
+        + b'\r\n'
+    )
+    head = (await reader.readuntil(b'\r\n\r\n')).decode('latin-1').split('\r\n')
+    response_headers = {}
+    for line in head[1:]:
+        key, _, value = line.partition(':')
+        response_headers[key.strip().lower()] = value.strip()
+    await reader.readexactly(int(response_headers['content-length']))
+    return int(head[0].split()[1]), response_headers
+
+
+async def client(
+    host: str,
+    port: int,
+    paths: List[str],
+    scenario: str,
+    latencies: List[float],
+    statuses: Dict[int, int],
+) -> None:
+    etags: Dict[str, str] = {}
+    connection = None
+    for path in paths:
+        headers = {'Connection': 'close'} if scenario == 'close' else {}
+        if scenario == 'revalidate' and path in etags:
+            headers['If-None-Match'] = etags[path]
+
+        start = time.perf_counter()
+        if connection is None:
+            connection = await asyncio.open_connection(host, port)
+        status, response_headers = await request(*connection, path, headers)
+        latencies.append(time.perf_counter() - start)
+        statuses[status] = statuses.get(status, 0) + 1
+
+        etags[path] = response_headers.get('etag', '')
+        if scenario == 'close':
+            connection[1].close()
+            connection = None
+    if connection is not None:
+        connection[1].close()
+
+
+async def run_scenario(
+    host: str,
+    port: int,
+    scenario: str,
+    notes: int,
+    connections: int,
+    requests: int,
+    seed: int,
+) -> None:
+    rnd = random.Random(seed)
+    # a few distinct paths per connection, so revalidation has something to revalidate
+    plans = []
+    for _ in range(connections):
+        paths = [
+            f'/?page={rnd.randint(1, max(notes // 100, 1))}' if rnd.random() < 0.2
+            else '/notes/' + quote(f'note #{rnd.randrange(notes)}', safe='')
+            for _ in range(10)
+        ]
+        plans.append([rnd.choice(paths) for _ in range(requests)])
+
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, paths, scenario, latencies, statuses) for paths in plans))
+    elapsed = time.perf_counter() - start
+
+    ms = sorted(latency * 1000 for latency in latencies)
+    print(
+        f'{scenario:<12}{len(ms) / elapsed:>12.0f}{ms[len(ms) // 2]:>9.2f}{ms[int(len(ms) * 0.99)]:>9.2f}'
+        f'{ms[-1]:>9.2f}   ' + ', '.join(f'{status}: {count}' for status, count in sorted(statuses.items()))
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--notes', type=int, default=10000, help='number of notes in the synthetic notebook')
+    parser.add_argument('--lines', type=int, default=50, help='maximum number of lines in a note')
+    parser.add_argument('--connections', type=int, default=50, help='number of concurrent connections')
+    parser.add_argument('--requests', type=int, default=200, help='number of requests per connection')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_root:
+        make_notebook(data_root, args.notes, args.lines, args.seed)
+        process, host, port = start_server(data_root)
+        try:
+            print(f'{args.connections} connections x {args.requests} requests, a notebook of {args.notes} notes')
+            print(f'{"scenario":<12}{"requests/s":>12}{"p50 ms":>9}{"p99 ms":>9}{"max ms":>9}   statuses')
+            for scenario in ('keep-alive', 'close', 'revalidate'):
+                asyncio.run(run_scenario(
+                    host, port, scenario, args.notes, args.connections, args.requests, args.seed,
+                ))
+        finally:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == '__main__':
+    main()
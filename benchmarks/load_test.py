@@ -0,0 +1,282 @@
+"""
+    Replays long keystroke sessions through the full NoteApp.run against a large synthetic notebook.
+
+    A session is a list of steps. Each step is the keystrokes that drive one transition between
+    sub-apps and the name of the sub-app the transition must lead to. The keystrokes of a step are
+    sent only when the previous transition is finished, so the time of a step is the latency from
+    the keystrokes to the result, including the construction of the sub-app. The number of output
+    flushes during a step is the number of redraws of the transition.
+
+    Sessions are either generated (gallery scrolls, view paging, edits, renames, deletes and creations)
+    or recorded: --record runs the app interactively in the terminal against the synthetic notebook,
+    writes the keystrokes of every step to a JSON file and then replays them. --save writes a generated
+    session to a file instead, and --session replays a session from a file.
+
+    Run:
+        python -m benchmarks.load_test [--notes 10000] [--steps 2000] [--record FILE | --save FILE | --session FILE]
+"""
+import argparse
+import json
+import random
+import statistics
+import tempfile
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Iterator, List, Tuple
+from prompt_toolkit.application import create_app_session
+from prompt_toolkit.input import Input, create_input, create_pipe_input
+from prompt_toolkit.input.posix_pipe import PosixPipeInput
+from prompt_toolkit.input.typeahead import get_typeahead, store_typeahead
+from prompt_toolkit.key_binding import KeyPress
+from prompt_toolkit.keys import Keys
+from prompt_toolkit.output import DummyOutput
+from application.note_app import NoteApp
+from application.notebooks import Notebooks
+from application.user import UserData
+
+
+DOWN = '\x1b[B'
+RIGHT = '\x1b[C'
+ENTER = '\r'
+SHIFT_END = '\x1b[1;2F'
+CTRL_S = '\x13'
+
+NOTEBOOK = 'load-test'
+WORDS = ['alpha', 'beta', '**gamma**', '*delta*', '`epsilon`', 'zeta', 'eta', '[theta](http://example.com)']
+
+# (name of the sub-app the step leads to, keystrokes)
+Step = Tuple[str | None, str]
+
+
+class CountingOutput(DummyOutput):
+    """
+    Output that counts its flushes. The renderer flushes the output once per redraw.
+    """
+
+    def __init__(self) -> None:
+        self.flushes = 0
+
+    def flush(self) -> None:
+        self.flushes += 1
+
+
+class ReplayApp(NoteApp):
+    """
+    The ReplayApp class runs a session step by step and records the latency and the redraws of every step.
+
+    Attributes:
+        records: (transition, latency in seconds, redraws) for each replayed step
+    """
+
+    def __init__(
+        self,
+        notebooks: Notebooks,
+        session: List[Step],
+        pipe_input: PosixPipeInput,
+        output: CountingOutput,
+    ) -> None:
+        super().__init__(notebooks)
+        self.records: List[Tuple[str, float, int]] = []
+        self._steps: Iterator[Step] = iter(session)
+        self._input = pipe_input
+        self._output = output
+
+    def _run_sub_app(self, note_num: int) -> int:
+        expected, keys = next(self._steps)
+        transition = f'{self._cur_sub_app.__name__} -> {expected}'
+
+        self._output.flushes = 0
+        self._input.send_text(keys)
+        start = time.perf_counter()
+        note_num = super()._run_sub_app(note_num)
+        latency = time.perf_counter() - start
+
+        actual = self._cur_sub_app.__name__ if self._cur_sub_app else None
+        if actual != expected:
+            raise RuntimeError(f'The session is out of sync: step {len(self.records)} led to {actual}, not {expected}')
+        self.records.append((transition, latency, self._output.flushes))
+        return note_num
+
+
+class RecordingApp(NoteApp):
+    """
+    The RecordingApp class runs the app with the keystrokes of the user and records them step by step:
+    the keys a sub-app handles and the name of the sub-app it leads to. The keys read ahead of
+    the exit of a sub-app are handled by the next one, so they belong to the next step.
+
+    Attributes:
+        session: the recorded steps
+    """
+
+    def __init__(self, notebooks: Notebooks, terminal_input: Input) -> None:
+        super().__init__(notebooks)
+        self.session: List[Step] = []
+        self._input = terminal_input
+        self._keys: List[str] = []
+        for name in ('read_keys', 'flush_keys'):
+            setattr(terminal_input, name, self._recording(getattr(terminal_input, name)))
+
+    def _recording(self, read: Callable[[], List[KeyPress]]) -> Callable[[], List[KeyPress]]:
+        def read_and_record() -> List[KeyPress]:
+            key_presses = read()
+            # the answers of the terminal to the cursor position requests are not keystrokes
+            self._keys.extend(self._data(key_presses))
+            return key_presses
+
+        return read_and_record
+
+    @staticmethod
+    def _data(key_presses: List[KeyPress]) -> List[str]:
+        # the answers of the terminal to the cursor position requests are not keystrokes
+        return [key_press.data for key_press in key_presses if key_press.key != Keys.CPRResponse]
+
+    def _run_sub_app(self, note_num: int) -> int:
+        note_num = super()._run_sub_app(note_num)
+        typeahead = get_typeahead(self._input)
+        store_typeahead(self._input, typeahead)
+        ahead = len(self._data(typeahead))
+        handled, self._keys = self._keys[:len(self._keys) - ahead], self._keys[len(self._keys) - ahead:]
+        self.session.append((self._cur_sub_app.__name__ if self._cur_sub_app else None, ''.join(handled)))
+        return note_num
+
+
+def make_notebook(data_root: str, notes: int, lines: int, seed: int) -> None:
+    rnd = random.Random(seed)
+    user_data = UserData(NOTEBOOK, data_root)
+    for i in range(notes):
+        title = f'note #{i}'
+        user_data.history.append(title)
+        user_data.notes[title] = '\n'.join(
+            ' '.join(rnd.choices(WORDS, k=8)) for _ in range(rnd.randint(1, lines))
+        )
+    user_data.dump_data()
+
+
+def generate_session(notes: int, steps: int, seed: int) -> List[Step]:
+    """
+    Generates a session by following the model of the sub-apps, so every step leads where it is expected to.
+    """
+    rnd = random.Random(seed)
+    count = notes
+    session: List[Step] = [('gallery', 'o')]
+    state, note_num, serial = 'gallery', 0, 0
+
+    while len(session) < steps:
+        if state == 'gallery':
+            action = rnd.choices(['view', 'delete', 'create'], weights=[8, 1, 1])[0] if count else 'create'
+            if action == 'create':
+                serial += 1
+                session.append(('factory', 'c'))
+                session.append(('editor', f'created {serial}{ENTER}'))
+                session.append(('view', ' '.join(rnd.choices(WORDS, k=5)) + CTRL_S))
+                state, note_num, count = 'view', count, count + 1
+                continue
+            note_num = rnd.randrange(min(count, 200))
+            keys = DOWN * note_num + ENTER
+            if action == 'view':
+                session.append(('view', keys + 'v'))
+                state = 'view'
+            else:
+                session.append(('deleter', keys + 'd'))
+                session.append(('gallery', RIGHT + ENTER))
+                count -= 1
+        else:
+            action = rnd.choices(['next', 'prev', 'edit', 'rename', 'delete', 'back'], weights=[6, 3, 2, 1, 1, 1])[0]
+            if action in ('next', 'prev'):
+                session.append(('view', 'n' if action == 'next' else 'p'))
+                note_num = (note_num + (1 if action == 'next' else -1)) % count
+            elif action == 'edit':
+                session.append(('editor', 'x'))
+                session.append(('view', ' '.join(rnd.choices(WORDS, k=5)) + ENTER + CTRL_S))
+            elif action == 'rename':
+                serial += 1
+                session.append(('factory', 'l'))
+                session.append(('view', f'{SHIFT_END}renamed {serial}{ENTER}'))
+            elif action == 'delete':
+                count -= 1
+                session.append(('deleter', 'd'))
+                if count:
+                    session.append(('view', RIGHT + ENTER))
+                    note_num = note_num if note_num == 0 else note_num - 1
+                else:
+                    session.append(('gallery', RIGHT + ENTER))
+                    state = 'gallery'
+            else:
+                session.append(('gallery', 'b'))
+                state = 'gallery'
+
+    if state == 'view':
+        session.append(('gallery', 'b'))
+    session.append((None, 'e'))
+    return session
+
+
+def replay(data_root: str, session: List[Step]) -> List[Tuple[str, float, int]]:
+    output = CountingOutput()
+    with create_pipe_input() as pipe_input, create_app_session(input=pipe_input, output=output):
+        app = ReplayApp(Notebooks(data_root), session, pipe_input, output)
+        app.run()
+    return app.records
+
+
+def record(data_root: str, terminal_input: Input | None = None) -> List[Step]:
+    """
+    Records a session of the user in the terminal, or from the given input.
+    """
+    terminal_input = terminal_input or create_input()
+    with create_app_session(input=terminal_input):
+        app = RecordingApp(Notebooks(data_root), terminal_input)
+        app.run()
+    return app.session
+
+
+def report(records: List[Tuple[str, float, int]]) -> None:
+    by_transition: Dict[str, List[Tuple[float, int]]] = defaultdict(list)
+    for transition, latency, redraws in records:
+        by_transition[transition].append((latency, redraws))
+        by_transition['all'].append((latency, redraws))
+
+    print(f'{"transition":<22}{"count":>7}{"p50 ms":>9}{"p90 ms":>9}{"p99 ms":>9}{"max ms":>9}{"redraws":>9}')
+    for transition, values in sorted(by_transition.items(), key=lambda item: item[0] == 'all'):
+        ms = sorted(latency * 1000 for latency, _ in values)
+        redraws = statistics.fmean(redraws for _, redraws in values)
+        print(
+            f'{transition:<22}{len(ms):>7}{ms[len(ms) // 2]:>9.2f}{ms[int(len(ms) * 0.9)]:>9.2f}'
+            f'{ms[int(len(ms) * 0.99)]:>9.2f}{ms[-1]:>9.2f}{redraws:>9.1f}'
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--notes', type=int, default=10000, help='number of notes in the synthetic notebook')
+    parser.add_argument('--lines', type=int, default=50, help='maximum number of lines in a note')
+    parser.add_argument('--steps', type=int, default=2000, help='number of steps in a generated session')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--session', help='replay the session from the JSON file instead of generating one')
+    parser.add_argument('--record', help='record a session in the terminal, write it to the JSON file and replay it')
+    parser.add_argument('--save', help='write the generated session to the JSON file')
+    args = parser.parse_args()
+
+    if args.session:
+        with open(args.session) as file:
+            session = [tuple(step) for step in json.load(file)]
+    elif args.record:
+        with tempfile.TemporaryDirectory() as data_root:
+            make_notebook(data_root, args.notes, args.lines, args.seed)
+            session = record(data_root)
+        with open(args.record, 'w') as file:
+            json.dump(session, file)
+    else:
+        session = generate_session(args.notes, args.steps, args.seed)
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(session, file)
+
+    with tempfile.TemporaryDirectory() as data_root:
+        make_notebook(data_root, args.notes, args.lines, args.seed)
+        print(f'{len(session)} steps against a notebook of {args.notes} notes')
+        report(replay(data_root, session))
+
+
+if __name__ == '__main__':
+    main()
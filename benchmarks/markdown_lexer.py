@@ -0,0 +1,95 @@
+"""
+    Measures the per-keystroke cost of Markdown highlighting on a large note.
+
+    Each keystroke inserts a character at a random line and highlights the screen around it,
+    as prompt-toolkit does after every change of the editor buffer. The cached lexer is compared
+    with a lexer that starts from scratch on every keystroke.
+
+    Run:
+        python -m benchmarks.markdown_lexer [--lines 20000] [--keystrokes 500]
+"""
+import argparse
+import gc
+import random
+import statistics
+import time
+from typing import Callable, List
+from prompt_toolkit.document import Document
+from application.markdown import MarkdownLexer
+
+
+SCREEN_HEIGHT = 40
+PARAGRAPH = [
+    '## Section',
+    'Some *emphasis*, some **strong** text and a [link](http://example.com).',
+    '- first item with `code`',
+    '- second item',
+    '```python',
+    'print("inside a fence")',
+    '```',
+    '> a quote',
+    '',
+]
+
+
+def make_note(lines: int) -> str:
+    return '\n'.join(PARAGRAPH[i % len(PARAGRAPH)] for i in range(lines))
+
+
+def keystrokes(text: str, count: int, seed: int) -> List[Document]:
+    """
+    Returns the sequence of documents produced by typing single characters at random places.
+    """
+    rnd = random.Random(seed)
+    documents = []
+    for _ in range(count):
+        position = rnd.randrange(len(text))
+        text = text[:position] + 'x' + text[position:]
+        documents.append(Document(text, position + 1))
+    return documents
+
+
+def measure(documents: List[Document], get_lexer: Callable[[], MarkdownLexer]) -> List[float]:
+    # like timeit, keep the garbage collector pauses out of the numbers
+    gc.collect()
+    gc.disable()
+    timings = []
+    for document in documents:
+        # the lines and the cursor row are computed by prompt-toolkit anyway, they are not a part of the lexing cost
+        top = max(0, document.cursor_position_row - SCREEN_HEIGHT // 2)
+        lexer = get_lexer()
+        start = time.perf_counter()
+        get_line = lexer.lex_document(document)
+        for lineno in range(top, top + SCREEN_HEIGHT):
+            get_line(lineno)
+        timings.append(time.perf_counter() - start)
+    gc.enable()
+    return timings
+
+
+def report(name: str, timings: List[float]) -> None:
+    ms = sorted(t * 1000 for t in timings)
+    print(
+        f'{name:>8}: mean {statistics.fmean(ms):.3f} ms, '
+        f'p50 {ms[len(ms) // 2]:.3f} ms, p99 {ms[int(len(ms) * 0.99)]:.3f} ms, max {ms[-1]:.3f} ms'
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', type=int, default=20000)
+    parser.add_argument('--keystrokes', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    documents = keystrokes(make_note(args.lines), args.keystrokes, args.seed)
+    print(f'{args.keystrokes} keystrokes in a note of {args.lines} lines, {SCREEN_HEIGHT} visible lines')
+
+    cached = MarkdownLexer()
+    cached.lex_document(Document(documents[0].text))(args.lines - 1)
+    report('cached', measure(documents, lambda: cached))
+    report('scratch', measure(documents, MarkdownLexer))
+
+
+if __name__ == '__main__':
+    main()
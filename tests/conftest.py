@@ -13,8 +13,9 @@ def mock_input():
 
 
 @pytest.fixture(autouse=True, scope="function")
-def user_data() -> 'UserData':
-    ud = UserData('non-existent-path')
+def user_data(tmp_path) -> 'UserData':
+    # the trash log is written next to the user data file
+    ud = UserData('non-existent-path', str(tmp_path))
     ud.history = [
         'note #1',
         'note #2',
@@ -0,0 +1,31 @@
+from application.links import LinkIndex
+
+
+class TestLinkIndex:
+
+    def test_build_and_update(self) -> None:
+        index = LinkIndex([('a', '[[b]] [[c]]'), ('b', '[[c]]'), ('c', '')])
+        assert index.backlinks('c') == {'a', 'b'}
+        assert index.backlinks('a') == set()
+
+        index.update('a', '[[b]] [[d]]')
+        assert index.backlinks('c') == {'b'}
+        assert index.backlinks('d') == {'a'}
+        assert index.outgoing['a'] == {'b', 'd'}
+
+        index.update('b', 'no links')
+        assert 'c' not in index.incoming
+        assert 'b' not in index.outgoing
+
+    def test_remove(self) -> None:
+        index = LinkIndex([('a', '[[b]]'), ('b', '[[a]]')])
+        index.remove('b')
+        assert index.backlinks('a') == set()
+        assert index.backlinks('b') == {'a'}
+
+    def test_rename(self) -> None:
+        index = LinkIndex([('a', '[[b]] [[a]]'), ('b', '[[a]]'), ('c', '[[b]]')])
+        assert index.rename('a', 'x') == {'x', 'b'}
+        assert index.backlinks('x') == {'x', 'b'}
+        assert index.backlinks('b') == {'x', 'c'}
+        assert index.outgoing == {'x': {'b', 'x'}, 'b': {'x'}, 'c': {'b'}}
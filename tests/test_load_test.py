@@ -0,0 +1,31 @@
+from prompt_toolkit.input.posix_pipe import PosixPipeInput
+from benchmarks.load_test import NOTEBOOK, DOWN, ENTER, generate_session, make_notebook, record, replay
+from application.user import UserData
+
+
+def test_generated_session_replays_in_sync(tmp_path) -> None:
+    make_notebook(str(tmp_path), notes=20, lines=3, seed=0)
+    session = generate_session(notes=20, steps=40, seed=0)
+
+    records = replay(str(tmp_path), session)
+    assert len(records) == len(session)
+    assert all(redraws > 0 for _, _, redraws in records)
+
+    # the changes made by the session are dumped when it exits
+    assert UserData(NOTEBOOK, str(tmp_path)).history != [f'note #{i}' for i in range(20)]
+
+
+def test_recorded_session_replays(tmp_path, mock_input: PosixPipeInput) -> None:
+    (tmp_path / 'recorded').mkdir()
+    (tmp_path / 'replayed').mkdir()
+    make_notebook(str(tmp_path / 'recorded'), notes=5, lines=3, seed=0)
+    mock_input.send_text('o')
+    mock_input.send_text(DOWN + ENTER + 'v')
+    mock_input.send_text('b')
+    mock_input.send_text('e')
+
+    session = record(str(tmp_path / 'recorded'), mock_input)
+    assert session == [('gallery', 'o'), ('view', DOWN + ENTER + 'v'), ('gallery', 'b'), (None, 'e')]
+
+    make_notebook(str(tmp_path / 'replayed'), notes=5, lines=3, seed=0)
+    assert len(replay(str(tmp_path / 'replayed'), session)) == len(session)
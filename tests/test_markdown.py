@@ -0,0 +1,99 @@
+from prompt_toolkit.document import Document
+from application.markdown import MarkdownLexer, common_affixes, to_html, wiki_link_at, wiki_links
+
+
+NOTE = '\n'.join([
+    '# Title',
+    '- item with **bold** and a [link](http://example.com)',
+    '```',
+    '# not a heading',
+    '```',
+    'plain `code` text',
+])
+
+
+class TestMarkdownLexer:
+
+    def test_block_styles(self) -> None:
+        get_line = MarkdownLexer().lex_document(Document(NOTE))
+
+        assert get_line(0) == [('class:md.heading', '# Title')]
+        assert get_line(3) == [('class:md.code', '# not a heading')]
+        assert get_line(4) == [('class:md.fence', '```')]
+        assert get_line(100) == []
+
+    def test_inline_styles(self) -> None:
+        get_line = MarkdownLexer().lex_document(Document(NOTE))
+
+        styles = [style for style, _ in get_line(1)]
+        assert styles == ['class:md.list', '', 'class:md.strong', '', 'class:md.link']
+        assert ''.join(text for _, text in get_line(5)) == 'plain `code` text'
+
+    def test_lines_below_are_not_lexed(self) -> None:
+        lexer = MarkdownLexer()
+        get_line = lexer.lex_document(Document('text\n' * 1000))
+
+        get_line(10)
+        assert lexer.lexed_lines == 10
+
+    def test_relex_from_edited_line(self) -> None:
+        text = 'text\n' * 1000
+        lexer = MarkdownLexer()
+        lexer.lex_document(Document(text))(999)
+        lexed_before = lexer.lexed_lines
+
+        edited = text[:5 * 990] + '```\n' + text[5 * 990:]
+        get_line = lexer.lex_document(Document(edited))
+        assert get_line(995) == [('class:md.code', 'text')]
+        assert lexer.lexed_lines - lexed_before == 5
+
+    def test_states_below_edit_are_reused(self) -> None:
+        text = 'text\n' * 1000
+        lexer = MarkdownLexer()
+        lexer.lex_document(Document(text))(999)
+        lexed_before = lexer.lexed_lines
+
+        edited = text[:5 * 10] + 'more ' + text[5 * 10:]
+        get_line = lexer.lex_document(Document(edited))
+        assert get_line(999) == [('', 'text')]
+        assert lexer.lexed_lines - lexed_before == 1
+
+    def test_common_affixes(self) -> None:
+        assert common_affixes('abc', 'abc') == (3, 0)
+        assert common_affixes('a\nb\nc', 'a\nxy\nc') == (2, 2)
+        assert common_affixes('aaa', 'aa') == (2, 0)
+        assert common_affixes('', 'a') == (0, 0)
+
+
+class TestWikiLinks:
+
+    def test_wiki_links(self) -> None:
+        text = 'see [[note #1]] and [[a [b] c]]\n`[[code]]`\n```\n[[fenced]]\n```\n- [[note #1]]'
+        assert wiki_links(text) == {'note #1', 'a [b] c'}
+
+    def test_wiki_links_in_emphasis(self) -> None:
+        assert wiki_links('**see [[x]]**\n*[[y]]*\n_[[z]]_ and [[with_underscore]] _a_') == {
+            'x', 'y', 'z', 'with_underscore',
+        }
+
+    def test_wiki_link_at(self) -> None:
+        line = 'see [[one]] and [[two]]'
+        assert wiki_link_at(line, 18) == 'two'
+        assert wiki_link_at(line, 0) == 'one'
+        assert wiki_link_at('no links', 0) is None
+
+    def test_highlight(self) -> None:
+        get_line = MarkdownLexer().lex_document(Document('see [[note]]'))
+        assert get_line(0) == [('', 'see '), ('class:md.wiki', '[[note]]')]
+
+        get_line = MarkdownLexer().lex_document(Document('*[[note]]*'))
+        assert get_line(0) == [
+            ('class:md.emphasis', '*'), ('class:md.emphasis class:md.wiki', '[[note]]'), ('class:md.emphasis', '*'),
+        ]
+
+    def test_to_html(self) -> None:
+        assert to_html('[[a & b]]') == '<p>\na &amp; b\n</p>'
+        assert to_html('[[a]]', lambda title: f'/{title}.html') == '<p>\n<a href="/a.html">a</a>\n</p>'
+        assert to_html('**see [[a_b]]**', lambda title: f'/{title}.html') == (
+            '<p>\n<strong>see <a href="/a_b.html">a_b</a></strong>\n</p>'
+        )
@@ -0,0 +1,100 @@
+import inspect
+import io
+import tracemalloc
+import pytest
+from prompt_toolkit.input.posix_pipe import PosixPipeInput
+from prompt_toolkit.widgets import RadioList
+from application.memory import SUBSYSTEMS, MemoryAccountant
+from application.note_app import NoteApp
+from application.notebooks import Notebooks
+from application.search import SavedSearch
+from application.sub_apps import editor
+from application.widgets import NoteList
+
+
+@pytest.fixture
+def notebooks(tmp_path) -> Notebooks:
+    notebooks = Notebooks(str(tmp_path))
+    for name in ('work', 'home'):
+        user_data = notebooks.switch(name)
+        user_data.history = [f'{name} note #{i}' for i in range(10)]
+        user_data.notes = {title: title * 100 for title in user_data.history}
+    return notebooks
+
+
+@pytest.fixture(autouse=True)
+def stop_tracing():
+    yield
+    tracemalloc.stop()
+
+
+class TestMemoryAccountant:
+
+    def test_report(self, notebooks: Notebooks, mock_input: PosixPipeInput, tmp_path) -> None:
+        mock_input.send_text('o')         # open "home"
+        mock_input.send_text('e')
+
+        with open(tmp_path / 'report.txt', 'w') as report:
+            NoteApp(notebooks, MemoryAccountant(report=report)).run()
+
+        header, *rows = (tmp_path / 'report.txt').read_text().splitlines()
+        assert header.split() == ['transition', 'total', *SUBSYSTEMS]
+        assert [row.split()[:3] for row in rows] == [
+            ['picker', '->', 'gallery'],
+            ['gallery', '->', 'None'],
+        ]
+
+    def test_edited_note_and_undo_stack(self, notebooks: Notebooks, mock_input: PosixPipeInput) -> None:
+        memory = MemoryAccountant(report=io.StringIO())
+        user_data = notebooks.active
+
+        mock_input.send_text('text ' * 20)
+        mock_input.send_bytes(b'\x13')   # Ctrl-S
+
+        app = editor(user_data, 0)
+        app.run()
+        sizes = memory.account(notebooks, app)
+
+        # every keystroke keeps a copy of the text in the undo stack
+        assert sizes['undo'] > 50 * len(user_data.notes[user_data.history[0]])
+        assert sizes['notes'] >= len(user_data.notes[user_data.history[0]])
+        assert sizes['total'] == sum(sizes[name] for name in SUBSYSTEMS)
+
+    def test_budget(self, notebooks: Notebooks) -> None:
+        memory = MemoryAccountant(budget=0)
+        memory.on_over_budget.append(notebooks.release_inactive)
+        memory.on_over_budget.append(notebooks.release_caches)
+        user_data = notebooks.active
+        search = SavedSearch.parse('home')
+        user_data.search_cache.results(user_data, search)
+        user_data.links.backlinks('home note #0')
+
+        memory.checkpoint('gallery -> view', notebooks, None)
+        assert [user_data.name for user_data in notebooks.open_notebooks()] == ['home']
+        assert user_data.search_cache._results == {}
+        assert user_data._links is None
+        assert user_data.search_cache.results(user_data, search) == set(user_data.history)
+
+    def test_budget_is_released_once_per_crossing(self, notebooks: Notebooks, monkeypatch) -> None:
+        memory = MemoryAccountant(budget=100)
+        assert memory._code_ranges == {}
+        releases = []
+        memory.on_over_budget.append(lambda: releases.append(memory.used_memory()))
+
+        # the release does not help, so it is not repeated while the memory stays over the budget
+        monkeypatch.setattr(MemoryAccountant, 'used_memory', staticmethod(lambda: 200))
+        memory.keep_budget()
+        memory.keep_budget()
+        assert releases == [200]
+
+        monkeypatch.setattr(MemoryAccountant, 'used_memory', staticmethod(lambda: 50))
+        memory.keep_budget()
+        monkeypatch.setattr(MemoryAccountant, 'used_memory', staticmethod(lambda: 150))
+        memory.keep_budget()
+        assert releases == [200, 150]
+
+    def test_note_list_belongs_to_gallery(self) -> None:
+        memory = MemoryAccountant(report=io.StringIO())
+        for cls in (NoteList, RadioList):
+            _, first_line = inspect.getsourcelines(cls)
+            assert memory._frame_subsystem(inspect.getsourcefile(cls), first_line + 1) == 'gallery'
@@ -0,0 +1,60 @@
+import pytest
+from prompt_toolkit.input.posix_pipe import PosixPipeInput
+from application.note_app import NoteApp
+from application.notebooks import Notebooks
+from application.user import UserData
+
+
+@pytest.fixture
+def notebooks(tmp_path) -> Notebooks:
+    for name in ('work', 'home'):
+        ud = UserData(name, str(tmp_path))
+        ud.history = [f'{name} note']
+        ud.notes = {f'{name} note': 'text'}
+        ud.dump_data()
+    return Notebooks(str(tmp_path), capacity=2)
+
+
+class TestNotebooks:
+
+    def test_names(self, notebooks: Notebooks) -> None:
+        notebooks.switch('new')
+        assert notebooks.names() == ['home', 'new', 'work']
+
+    def test_no_active_notebook(self, notebooks: Notebooks) -> None:
+        with pytest.raises(LookupError):
+            notebooks.active
+
+    def test_switch(self, notebooks: Notebooks) -> None:
+        user_data = notebooks.switch('work')
+        assert notebooks.active is user_data
+        assert user_data.history == ['work note']
+
+    def test_switch_back_is_instant(self, notebooks: Notebooks) -> None:
+        work = notebooks.switch('work')
+        notebooks.switch('home')
+        assert notebooks.switch('work') is work
+
+    def test_least_recently_used_are_released(self, notebooks: Notebooks) -> None:
+        work = notebooks.switch('work')
+        work.notes['work note'] = 'changed'
+        notebooks.switch('home')
+        notebooks.switch('new')
+
+        reopened = notebooks.switch('work')
+        assert reopened is not work
+        assert reopened.notes['work note'] == 'changed'
+
+
+class TestNoteApp:
+
+    def test_open_and_switch_notebook(self, notebooks: Notebooks, mock_input: PosixPipeInput) -> None:
+        mock_input.send_text('o')         # open "home", the first notebook
+        mock_input.send_text('n')         # back to the picker
+        mock_input.send_bytes(b'\x1b[B')  # DOWN
+        mock_input.send_bytes(b'\r')      # ENTER
+        mock_input.send_text('o')         # open "work"
+        mock_input.send_text('e')
+
+        NoteApp(notebooks).run()
+        assert notebooks.active.name == 'work'
@@ -0,0 +1,44 @@
+import pytest
+from application import publish as publish_module
+from application.publish import INDEX, page_name, publish
+from application.user import UserData
+
+
+@pytest.fixture
+def site(tmp_path) -> str:
+    return str(tmp_path / 'site')
+
+
+class TestPublish:
+
+    def test_first_publish(self, user_data: UserData, site: str, tmp_path) -> None:
+        result = publish(user_data, site, jobs=1)
+        assert result == (3, 0, 0)
+
+        index = (tmp_path / 'site' / INDEX).read_text()
+        positions = [index.index(page_name(title)) for title in user_data.history]
+        assert positions == sorted(positions)
+        assert 'text,\n text' in (tmp_path / 'site' / page_name('note #2')).read_text()
+
+    def test_rerun_renders_only_changes(self, user_data: UserData, site: str, tmp_path) -> None:
+        publish(user_data, site, jobs=1)
+        assert publish(user_data, site, jobs=1) == (0, 0, 3)
+
+        user_data.notes['note #1'] = '# changed'
+        deleted = user_data.history.pop(1)
+        user_data.notes.pop(deleted)
+
+        assert publish(user_data, site, jobs=1) == (1, 1, 1)
+        assert '<h1>changed</h1>' in (tmp_path / 'site' / page_name('note #1')).read_text()
+        assert not (tmp_path / 'site' / page_name(deleted)).exists()
+        assert page_name(deleted) not in (tmp_path / 'site' / INDEX).read_text()
+
+    def test_subset(self, user_data: UserData, site: str) -> None:
+        assert publish(user_data, site, ['note #3'], jobs=1) == (1, 0, 0)
+        assert publish(user_data, site, jobs=1) == (2, 0, 1)
+
+    def test_process_pool(self, user_data: UserData, site: str, tmp_path, monkeypatch) -> None:
+        monkeypatch.setattr(publish_module, 'PARALLEL_THRESHOLD', 0)
+
+        assert publish(user_data, site, jobs=2) == (3, 0, 0)
+        assert all((tmp_path / 'site' / page_name(title)).exists() for title in user_data.history)
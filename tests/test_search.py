@@ -0,0 +1,77 @@
+from datetime import datetime
+import pytest
+from application.search import SavedSearch
+from application.user import UserData
+
+
+class TestSavedSearch:
+
+    def test_parse(self) -> None:
+        search = SavedSearch.parse(' Note  #todo since:2024-01-01 until:2024-01-31 ')
+        assert search.query == 'Note  #todo since:2024-01-01 until:2024-01-31'
+        assert search.text == 'note'
+        assert search.tag == 'todo'
+        assert search.since == datetime(2024, 1, 1).timestamp()
+        assert search.until == datetime(2024, 2, 1).timestamp()
+
+    def test_parse_errors(self) -> None:
+        with pytest.raises(ValueError):
+            SavedSearch.parse('since:yesterday')
+        with pytest.raises(ValueError):
+            SavedSearch.parse('#a #b')
+
+    def test_matches(self, user_data: UserData) -> None:
+        user_data.tags = {'note #2': {'todo'}}
+        user_data.touch(['note #2'])
+
+        assert [title for title in user_data.history if SavedSearch.parse('#2').matches(user_data, title)] == []
+        assert SavedSearch.parse('NOTE #todo').matches(user_data, 'note #2')
+        assert not SavedSearch.parse('#todo').matches(user_data, 'note #1')
+        assert SavedSearch.parse(f'since:{datetime.now():%Y-%m-%d}').matches(user_data, 'note #2')
+        assert not SavedSearch.parse(f'since:{datetime.now():%Y-%m-%d}').matches(user_data, 'note #1')
+
+
+class TestSearchCache:
+
+    def test_results_are_updated_incrementally(self, user_data: UserData, monkeypatch) -> None:
+        evaluated = []
+        matches = SavedSearch.matches
+
+        def counting_matches(self, data: UserData, title: str) -> bool:
+            evaluated.append(title)
+            return matches(self, data, title)
+
+        monkeypatch.setattr(SavedSearch, 'matches', counting_matches)
+        search = SavedSearch.parse('#todo')
+
+        assert user_data.search_cache.results(user_data, search) == set()
+        assert evaluated == user_data.history
+
+        evaluated.clear()
+        assert user_data.search_cache.results(user_data, search) == set()
+        assert evaluated == []
+
+        user_data.tag_notes(['note #1', 'note #3'], 'todo')
+        assert user_data.search_cache.results(user_data, search) == {'note #1', 'note #3'}
+        assert sorted(evaluated) == ['note #1', 'note #3']
+
+        evaluated.clear()
+        user_data.notes['renamed'] = user_data.notes.pop('note #1')
+        user_data.tags['renamed'] = user_data.tags.pop('note #1')
+        user_data.history[0] = 'renamed'
+        user_data.touch(['note #1', 'renamed'])
+        user_data.notes.pop('note #3')
+        user_data.history.pop()
+        user_data.touch(['note #3'])
+        assert user_data.search_cache.results(user_data, search) == {'renamed'}
+        assert evaluated == ['renamed']
+
+    def test_trashed_notes_are_excluded(self, user_data: UserData) -> None:
+        search = SavedSearch.parse('note')
+        assert user_data.search_cache.results(user_data, search) == {'note #1', 'note #2', 'note #3'}
+
+        user_data.trash_notes(['note #2'])
+        assert user_data.search_cache.results(user_data, search) == {'note #1', 'note #3'}
+
+        user_data.restore_notes(['note #2'])
+        assert user_data.search_cache.results(user_data, search) == {'note #1', 'note #2', 'note #3'}
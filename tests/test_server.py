@@ -0,0 +1,123 @@
+import asyncio
+from http import HTTPStatus
+from application.memory import MemoryAccountant
+from application.server import NoteServer, note_path, render_note
+from application.user import UserData
+
+
+def make_server(user_data: UserData, tmp_path) -> NoteServer:
+    user_data._abspath = str(tmp_path / 'notes.pickle')
+    user_data.dump_data()
+    return NoteServer('notes', str(tmp_path))
+
+
+class TestNoteServer:
+
+    def test_index_pages(self, user_data: UserData, tmp_path) -> None:
+        server = make_server(user_data, tmp_path)
+
+        response = server.respond('GET', '/?page=2&per_page=2', {})
+        assert response.status == HTTPStatus.OK
+        assert note_path('note #3').encode() in response.body
+        assert note_path('note #1').encode() not in response.body
+        assert b'page 2 of 2' in response.body
+
+        assert server.respond('GET', '/?page=x', {}).status == HTTPStatus.BAD_REQUEST
+        assert server.respond('POST', '/', {}).status == HTTPStatus.METHOD_NOT_ALLOWED
+
+    def test_note(self, user_data: UserData, tmp_path) -> None:
+        user_data.notes['note #2'] = '**bold**'
+        server = make_server(user_data, tmp_path)
+
+        response = server.respond('GET', note_path('note #2'), {})
+        assert response.status == HTTPStatus.OK
+        assert b'<strong>bold</strong>' in response.body
+        assert server.respond('GET', note_path('note #4'), {}).status == HTTPStatus.NOT_FOUND
+
+    def test_conditional_requests(self, user_data: UserData, tmp_path) -> None:
+        server = make_server(user_data, tmp_path)
+        headers = server.respond('GET', note_path('note #1'), {}).headers
+
+        response = server.respond('GET', note_path('note #1'), {'if-none-match': headers['ETag']})
+        assert response.status == HTTPStatus.NOT_MODIFIED
+        response = server.respond('GET', note_path('note #1'), {'if-modified-since': headers['Last-Modified']})
+        assert response.status == HTTPStatus.NOT_MODIFIED
+
+        user_data.notes['note #1'] = 'changed'
+        user_data.touch(['note #1'])
+        user_data.dump_data()
+
+        async def reload() -> None:
+            await server.refresh()
+
+        asyncio.run(reload())
+
+        response = server.respond('GET', note_path('note #1'), {'if-none-match': headers['ETag']})
+        assert response.status == HTTPStatus.OK
+        assert b'changed' in response.body
+
+    def test_keep_alive(self, user_data: UserData, tmp_path) -> None:
+        server = make_server(user_data, tmp_path)
+
+        async def get_twice() -> list:
+            tcp_server = await server.start(port=0)
+            reader, writer = await asyncio.open_connection(*tcp_server.sockets[0].getsockname())
+            responses = []
+            for connection in ('keep-alive', 'close'):
+                writer.write(f'GET {note_path("note #1")} HTTP/1.1\r\nConnection: {connection}\r\n\r\n'.encode())
+                head = await reader.readuntil(b'\r\n\r\n')
+                length = int(head.split(b'Content-Length: ')[1].split(b'\r\n')[0])
+                responses.append((head, await reader.readexactly(length)))
+            assert await reader.read() == b''
+            writer.close()
+            tcp_server.close()
+            await tcp_server.wait_closed()
+            return responses
+
+        (first_head, first_body), (second_head, _) = asyncio.run(get_twice())
+        assert first_head.startswith(b'HTTP/1.1 200 OK')
+        assert b'Connection: keep-alive' in first_head
+        assert b'Connection: close' in second_head
+        assert b'<h1>note #1</h1>' in first_body
+
+    def test_request_body_errors(self, user_data: UserData, tmp_path) -> None:
+        server = make_server(user_data, tmp_path)
+        errors = []
+
+        async def send_all() -> list:
+            asyncio.get_running_loop().set_exception_handler(lambda loop, context: errors.append(context))
+            tcp_server = await server.start(port=0)
+            responses = []
+            for request in (
+                b'GET / HTTP/1.1\r\nContent-Length: -5\r\n\r\n',
+                b'GET / HTTP/1.1\r\nContent-Length: 100000000\r\n\r\n',
+                b'GET / HTTP/1.1\r\nContent-Length: 10\r\n\r\nshort',
+            ):
+                reader, writer = await asyncio.open_connection(*tcp_server.sockets[0].getsockname())
+                writer.write(request)
+                writer.write_eof()
+                responses.append(await reader.read())
+                writer.close()
+            tcp_server.close()
+            await tcp_server.wait_closed()
+            return responses
+
+        bad_length, too_large, short_body = asyncio.run(send_all())
+        assert bad_length.startswith(b'HTTP/1.1 400 Bad Request')
+        assert too_large.startswith(b'HTTP/1.1 413 Request Entity Too Large')
+        assert short_body == b''
+        assert errors == []
+
+    def test_memory_budget(self, user_data: UserData, tmp_path) -> None:
+        memory = MemoryAccountant(budget=0)
+        user_data._abspath = str(tmp_path / 'notes.pickle')
+        user_data.dump_data()
+        server = NoteServer('notes', str(tmp_path), memory)
+
+        server.respond('GET', '/', {})
+        server.respond('GET', note_path('note #1'), {})
+        assert server._index_pages and render_note.cache_info().currsize
+
+        memory.keep_budget()
+        assert not server._index_pages
+        assert render_note.cache_info().currsize == 0
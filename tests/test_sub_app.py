@@ -1,11 +1,20 @@
 from prompt_toolkit.input.posix_pipe import PosixPipeInput
 from prompt_toolkit.key_binding import KeyBindings, merge_key_bindings
+from prompt_toolkit.layout.controls import FormattedTextControl
+from application.notebooks import Notebooks
 from application.user import UserData
 from application.sub_apps import (
+    batch_deleter,
     deleter,
     editor,
     factory,
     gallery,
+    notebook_factory,
+    picker,
+    purger,
+    searcher,
+    tagger,
+    trash,
     view,
 )
 
@@ -58,6 +67,161 @@ class TestGallery:
         result = app.run()
         assert result == (deleter, 1)
 
+    def test_mark_notes(self, user_data: UserData, mock_input: PosixPipeInput) -> None:
+        mock_input.send_text(' ')         # mark the first note
+        mock_input.send_bytes(b'\x1b[B')  # DOWN
+        mock_input.send_bytes(b'\x1b[B')  # DOWN
+        mock_input.send_text(' ')         # mark the third note
+        mock_input.send_text(' ')         # and unmark it
+        mock_input.send_text('d')
+
+        app = gallery(user_data)
+        result = app.run()
+        assert result == (batch_deleter, 0)
+        assert user_data.marked == {'note #1'}
+
+    def test_mark_range(self, user_data: UserData, mock_input: PosixPipeInput) -> None:
+        mock_input.send_bytes(b'\x1b[B')  # DOWN
+        mock_input.send_text(' ')         # mark the second note
+        mock_input.send_bytes(b'\x1b[B')  # DOWN
+        mock_input.send_text('r')         # mark the range up to the third note
+        mock_input.send_text('t')
+
+        app = gallery(user_data)
+        result = app.run()
+        assert result == (tagger, 0)
+        assert user_data.marked == {'note #2', 'note #3'}
+
+    def test_mark_all(self, user_data: UserData, mock_input: PosixPipeInput) -> None:
+        mock_input.send_text('a')
+        mock_input.send_text('e')
+
+        app = gallery(user_data)
+        app.run()
+        assert user_data.marked == set(user_data.history)
+
+    def test_tag_without_marks(self, user_data: UserData, mock_input: PosixPipeInput) -> None:
+        mock_input.send_text('t')         # it Shouldn't work.
+        mock_input.send_text('x')         # it Shouldn't work.
+        mock_input.send_text('e')
+
+        app = gallery(user_data)
+        result = app.run()
+        assert result == (None, 0)
+
+    def test_select_note_num(self, user_data: UserData, mock_input: PosixPipeInput) -> None:
+        mock_input.send_text('v')
+
+        app = gallery(user_data, 2)
+        result = app.run()
+        assert result == (view, 2)
+
+    def test_call_picker(self, user_data: UserData, mock_input: PosixPipeInput) -> None:
+        mock_input.send_text('n')
+
+        app = gallery(user_data)
+        result = app.run()
+        assert result == (picker, 0)
+
+    def test_filter(self, user_data: UserData, mock_input: PosixPipeInput) -> None:
+        user_data.searches = ['3', '2']
+        user_data.search = '3'
+
+        mock_input.send_text('f')
+
+        app = gallery(user_data)
+        result = app.run()
+        assert result == (gallery, None)
+        assert user_data.search == '2'
+
+        mock_input.send_bytes(b'\x1b[B')  # DOWN - the list has only one note.
+        mock_input.send_bytes(b'\r')      # ENTER
+        mock_input.send_text('v')
+
+        app = gallery(user_data)
+        result = app.run()
+        assert result == (view, 1)
+
+    def test_list_searches(self, user_data: UserData) -> None:
+        user_data.searches = ['3', '2']
+        user_data.search = '2'
+
+        app = gallery(user_data)
+        texts = [
+            window.content.text for window in app.layout.find_all_windows()
+            if isinstance(window.content, FormattedTextControl)
+        ]
+        assert [('', '  All notes\n'), ('', '  3\n'), ('bold', '> 2\n')] in texts
+
+    def test_filter_without_results(self, user_data: UserData, mock_input: PosixPipeInput) -> None:
+        user_data.searches = ['#todo']
+        user_data.search = '#todo'
+
+        mock_input.send_text('v')         # it Shouldn't work.
+        mock_input.send_text('f')
+
+        app = gallery(user_data)
+        result = app.run()
+        assert result == (gallery, None)
+        assert user_data.search is None
+
+    def test_call_trash(self, user_data: UserData, mock_input: PosixPipeInput) -> None:
+        mock_input.send_text('h')
+
+        app = gallery(user_data)
+        result = app.run()
+        assert result == (trash, None)
+
+    def test_undo_deletion(self, user_data: UserData, mock_input: PosixPipeInput) -> None:
+        user_data.trash_notes(['note #1'])
+        user_data.trash_notes(['note #3'])
+        mock_input.send_text('u')
+
+        app = gallery(user_data)
+        result = app.run()
+        assert result == (gallery, 2)
+        assert list(user_data.trash) == ['note #1']
+
+    def test_undo_batch_deletion(self, user_data: UserData, mock_input: PosixPipeInput) -> None:
+        user_data.trash_notes(['note #1'])
+        user_data.trash_notes(['note #3', 'note #2'])
+        mock_input.send_text('u')
+
+        app = gallery(user_data)
+        result = app.run()
+        assert result == (gallery, 1)
+        assert list(user_data.trash) == ['note #1']
+
+
+class TestSearcher:
+
+    def test_save_search(self, user_data: UserData, mock_input: PosixPipeInput) -> None:
+        mock_input.send_text('since:yesterday')  # it Shouldn't be accepted.
+        mock_input.send_bytes(b'\r')             # ENTER
+        mock_input.send_bytes(b'\x7f' * 15)      # BACKSPACE
+        mock_input.send_text('#1 ')
+        mock_input.send_bytes(b'\r')             # ENTER
+
+        app = searcher(user_data, 2)
+        result = app.run()
+        assert result == (gallery, None)
+        assert user_data.searches == ['#1']
+        assert user_data.search == '#1'
+
+    def test_forget_search(self, user_data: UserData, mock_input: PosixPipeInput) -> None:
+        user_data.searches = ['#1', '#2']
+        user_data.search = '#1'
+
+        mock_input.send_bytes(b'\t')      # TAB
+        mock_input.send_bytes(b'\t')      # TAB
+        mock_input.send_bytes(b'\r')      # ENTER
+
+        app = searcher(user_data, 0)
+        result = app.run()
+        assert result == (gallery, None)
+        assert user_data.searches == ['#2']
+        assert user_data.search is None
+
 
 class TestDeleter:
 
@@ -75,7 +239,8 @@ class TestDeleter:
 
         app = deleter(user_data, 0, view)
         result = app.run()
-        assert result == (view, 0)
+        assert result == (view, 1)
+        assert list(user_data.trash) == ['note #1']
 
     def test_ok_with_single_note(self, user_data: UserData, mock_input: PosixPipeInput) -> None:
         # prepare data
@@ -98,8 +263,116 @@ class TestDeleter:
         assert result == (view, 0)
 
 
+class TestBatchDeleter:
+
+    def test_ok(self, user_data: UserData, mock_input: PosixPipeInput) -> None:
+        user_data.marked = {'note #1', 'note #3'}
+
+        mock_input.send_bytes(b'\x1b[C')  # RIGHT
+        mock_input.send_bytes(b'\r')      # ENTER
+
+        app = batch_deleter(user_data, 1)
+        result = app.run()
+        assert result == (gallery, None)
+        assert set(user_data.trash) == {'note #1', 'note #3'}
+        assert user_data.visible_count == 1
+        assert not user_data.marked
+
+    def test_cancel(self, user_data: UserData, mock_input: PosixPipeInput) -> None:
+        user_data.marked = {'note #1', 'note #3'}
+        mock_input.send_bytes(b'\r')      # ENTER
+
+        app = batch_deleter(user_data, 1)
+        result = app.run()
+        assert result == (gallery, 1)
+        assert len(user_data.history) == 3
+
+
+class TestTrash:
+
+    def test_empty_trash(self, user_data: UserData, mock_input: PosixPipeInput) -> None:
+        mock_input.send_text('r')         # it Shouldn't work.
+        mock_input.send_text('p')         # it Shouldn't work.
+        mock_input.send_text('b')
+
+        app = trash(user_data)
+        result = app.run()
+        assert result == (gallery, None)
+        assert user_data.history == ['note #1', 'note #2', 'note #3']
+
+    def test_restore(self, user_data: UserData, mock_input: PosixPipeInput) -> None:
+        user_data.trash_notes(['note #1'])
+        user_data.trash_notes(['note #3'])
+        # the most recently deleted note is the first one
+        mock_input.send_bytes(b'\x1b[B')  # DOWN
+        mock_input.send_text('r')
+
+        app = trash(user_data)
+        result = app.run()
+        assert result == (trash, None)
+        assert list(user_data.trash) == ['note #3']
+
+    def test_call_purger(self, user_data: UserData, mock_input: PosixPipeInput) -> None:
+        user_data.trash_notes(['note #1', 'note #3'])
+        mock_input.send_text('p')
+
+        app = trash(user_data)
+        result = app.run()
+        assert result == (purger, None)
+        assert len(user_data.trash) == 2
+
+
+class TestPurger:
+
+    def test_ok(self, user_data: UserData, mock_input: PosixPipeInput) -> None:
+        user_data.trash_notes(['note #1', 'note #3'])
+        mock_input.send_bytes(b'\x1b[C')  # RIGHT
+        mock_input.send_bytes(b'\r')      # ENTER
+
+        app = purger(user_data)
+        result = app.run()
+        assert result == (gallery, None)
+        assert user_data.history == ['note #2']
+        assert user_data.trash == {}
+
+    def test_cancel(self, user_data: UserData, mock_input: PosixPipeInput) -> None:
+        user_data.trash_notes(['note #1', 'note #3'])
+        mock_input.send_bytes(b'\r')      # ENTER
+
+        app = purger(user_data)
+        result = app.run()
+        assert result == (trash, None)
+        assert user_data.history == ['note #1', 'note #2', 'note #3']
+        assert list(user_data.trash) == ['note #1', 'note #3']
+
+
 class TestView:
 
+    def test_follow_link(self, user_data: UserData, mock_input: PosixPipeInput) -> None:
+        user_data.notes['note #1'] = 'first [[missing]]\nsee [[note #1]] and [[note #3]]'
+
+        mock_input.send_text('g')         # the link to a missing note Shouldn't work.
+        mock_input.send_bytes(b'\x1b[B')  # DOWN
+        mock_input.send_bytes(b'\x1b[F')  # END
+        mock_input.send_bytes(b'\x1b[D')  # LEFT
+        mock_input.send_text('g')
+
+        app = view(user_data, 0)
+        result = app.run()
+        assert result == (view, 2)
+
+    def test_follow_backlink(self, user_data: UserData, mock_input: PosixPipeInput) -> None:
+        user_data.notes['note #1'] = '[[note #2]]'
+        user_data.notes['note #3'] = '[[note #2]]'
+
+        mock_input.send_bytes(b'\t')      # TAB
+        mock_input.send_bytes(b'\x1b[B')  # DOWN
+        mock_input.send_text('g')
+
+        app = view(user_data, 1)
+        result = app.run()
+        assert result == (view, 2)
+
     def test_call_deleter(self, user_data: UserData, mock_input: PosixPipeInput) -> None:
         mock_input.send_text('d')
 
@@ -138,6 +411,14 @@ class TestView:
             ff, note_num = app.run()
         assert (ff, note_num) == (view, 1)
 
+    def test_skip_trashed_notes(self, user_data: UserData, mock_input: PosixPipeInput) -> None:
+        user_data.trash_notes(['note #2'])
+        mock_input.send_text('n')
+
+        app = view(user_data, 0)
+        result = app.run()
+        assert result == (view, 2)
+
     def test_call_view_next_note(self, user_data: UserData, mock_input: PosixPipeInput) -> None:
         note_num = 1
         ff = view
@@ -168,6 +449,7 @@ class TestEditor:
         result = app.run()
         assert result == (view, -1)
         assert user_data.notes[note] == line1 + '\n' + line2
+        assert user_data.stamps == {note: user_data.generation}
 
     def test_exit_with_cancel(self, user_data: UserData, mock_input: PosixPipeInput) -> None:
         notes_before = user_data.notes.copy()
@@ -219,6 +501,27 @@ class Testfactory:
         result = app.run()
         assert result == (view, 0)
         assert new_note_title == user_data.history[0]
+        assert user_data.changed_since(0) == {'note #1', new_note_title}
+
+    def test_title_that_cannot_be_linked(self, user_data: UserData) -> None:
+        buffer = factory(user_data, len(user_data.history), gallery).layout.current_buffer
+        for title in ('draft]', 'a [[b', 'a]] b'):
+            buffer.text = title
+            assert not buffer.validate()
+            assert 'end with ]' in buffer.validation_error.message
+        buffer.text = 'a [b] c'
+        assert buffer.validate()
+
+    def test_title_in_trash(self, user_data: UserData) -> None:
+        user_data.trash_notes(['note #2'])
+
+        buffer = factory(user_data, len(user_data.history), gallery).layout.current_buffer
+        buffer.text = 'note #2'
+        assert not buffer.validate()
+        assert 'in the trash' in buffer.validation_error.message
+        buffer.text = 'note #1'
+        assert not buffer.validate()
+        assert 'unique' in buffer.validation_error.message
 
     def test_create_new_note(self, user_data: UserData, mock_input: PosixPipeInput) -> None:
         note_title = 'note title'
@@ -250,3 +553,77 @@ class Testfactory:
         app.key_bindings = merge_key_bindings([app.key_bindings, exit_key])
         result = app.run()
         assert result == 2*note_title
+
+
+class TestTagger:
+
+    def test_tag_marked_notes(self, user_data: UserData, mock_input: PosixPipeInput) -> None:
+        user_data.marked = {'note #1', 'note #3'}
+
+        mock_input.send_text('to do')      # it Shouldn't be accepted.
+        mock_input.send_bytes(b'\r')       # ENTER
+        mock_input.send_bytes(b'\x7f' * 3)  # BACKSPACE
+        mock_input.send_text('do')
+        mock_input.send_bytes(b'\r')       # ENTER
+
+        app = tagger(user_data, 2)
+        result = app.run()
+        assert result == (gallery, 2)
+        assert user_data.tags == {'note #1': {'todo'}, 'note #3': {'todo'}}
+
+
+class TestPicker:
+
+    def test_no_notebooks(self, tmp_path, mock_input: PosixPipeInput) -> None:
+        mock_input.send_text('o')         # it Shouldn't work.
+        mock_input.send_text('e')
+
+        app = picker(Notebooks(str(tmp_path)))
+        result = app.run()
+        assert result == (None, 0)
+
+    def test_open_notebook(self, tmp_path, mock_input: PosixPipeInput) -> None:
+        notebooks = Notebooks(str(tmp_path))
+        for name in ('a', 'b'):
+            notebooks.switch(name)
+
+        mock_input.send_bytes(b'\x1b[A')  # UP
+        mock_input.send_bytes(b'\r')      # ENTER
+        mock_input.send_text('o')
+
+        app = picker(notebooks)
+        result = app.run()
+        assert result == (gallery, 0)
+        assert notebooks.active.name == 'a'
+
+    def test_call_notebook_factory(self, tmp_path, mock_input: PosixPipeInput) -> None:
+        mock_input.send_text('c')
+
+        app = picker(Notebooks(str(tmp_path)))
+        result = app.run()
+        assert result == (notebook_factory, 0)
+
+
+class TestNotebookFactory:
+
+    def test_create_notebook(self, tmp_path, mock_input: PosixPipeInput) -> None:
+        notebooks = Notebooks(str(tmp_path))
+
+        mock_input.send_text('/')          # it Shouldn't be accepted.
+        mock_input.send_bytes(b'\r')       # ENTER
+        mock_input.send_bytes(b'\x7f')     # BACKSPACE
+        mock_input.send_text('journal')
+        mock_input.send_bytes(b'\r')       # ENTER
+
+        app = notebook_factory(notebooks)
+        result = app.run()
+        assert result == (gallery, 0)
+        assert notebooks.active.name == 'journal'
+
+    def test_cancel(self, tmp_path, mock_input: PosixPipeInput) -> None:
+        mock_input.send_bytes(b'\x09')     # Tab
+        mock_input.send_bytes(b'\r')       # ENTER
+
+        app = notebook_factory(Notebooks(str(tmp_path)))
+        result = app.run()
+        assert result == (picker, 0)
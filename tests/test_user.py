@@ -0,0 +1,162 @@
+import os
+import pickle
+from application import user
+from application.user import UserData
+
+
+class TestUserData:
+
+    def test_dump_and_load(self, user_data: UserData, tmp_path) -> None:
+        user_data._abspath = str(tmp_path / 'notes.pickle')
+        user_data.tags = {'note #1': {'todo'}}
+        user_data.marked = {'note #2'}
+        user_data.dump_data()
+
+        loaded = UserData('notes', str(tmp_path))
+        assert loaded.history == user_data.history
+        assert loaded.notes == user_data.notes
+        assert loaded.tags == user_data.tags
+        assert loaded.marked == set()
+
+    def test_load_without_tags(self, tmp_path) -> None:
+        with open(tmp_path / 'notes.pickle', 'wb') as file:
+            pickle.dump(['note'], file)
+            pickle.dump({'note': 'text'}, file)
+
+        loaded = UserData('notes', str(tmp_path))
+        assert loaded.history == ['note']
+        assert loaded.tags == {}
+
+    def test_trash_notes(self, user_data: UserData, tmp_path) -> None:
+        user_data._abspath = str(tmp_path / 'notes.pickle')
+        user_data.marked = {'note #1'}
+        user_data.dump_data()
+        dumped = os.stat(tmp_path / 'notes.pickle').st_mtime_ns
+
+        user_data.trash_notes(['note #1', 'note #3'])
+        user_data.restore_notes(['note #3'])
+        assert list(user_data.trash) == ['note #1']
+        assert user_data.history == ['note #1', 'note #2', 'note #3']
+        assert not user_data.marked
+        assert not user_data.changed
+        assert os.stat(tmp_path / 'notes.pickle').st_mtime_ns == dumped
+
+        loaded = UserData('notes', str(tmp_path))
+        assert list(loaded.trash) == ['note #1']
+        assert loaded.generation == user_data.generation
+        assert not loaded.changed
+
+        loaded.dump_data()
+        assert not (tmp_path / 'notes.trash').exists()
+        assert list(UserData('notes', str(tmp_path)).trash) == ['note #1']
+
+    def test_last_deletion(self, user_data: UserData) -> None:
+        assert user_data.last_deletion() == []
+
+        user_data.trash_notes(['note #1'])
+        user_data.trash_notes(['note #3', 'note #2'])
+        assert user_data.last_deletion() == ['note #3', 'note #2']
+
+        user_data.restore_notes(['note #2'])
+        assert user_data.last_deletion() == ['note #3']
+
+    def test_compact_trash(self, user_data: UserData, monkeypatch, tmp_path) -> None:
+        monkeypatch.setattr(user, 'TRASH_LIMIT', 1)
+        user_data._abspath = str(tmp_path / 'notes.pickle')
+        user_data.tags = {'note #1': {'todo'}}
+
+        # the notes deleted since the notebook was opened are kept over the limit
+        user_data.trash_notes(['note #1', 'note #2'])
+        assert not user_data.compact_trash()
+        user_data.dump_data()
+
+        reopened = UserData('notes', str(tmp_path))
+        reopened.trash_notes(['note #3'])
+        assert reopened.compact_trash()
+        assert reopened.history == ['note #3']
+        assert list(reopened.trash) == ['note #3']
+        assert reopened.tags == {}
+        assert 'note #1' not in reopened.stamps
+        assert not reopened.compact_trash()
+
+        # the aged notes wait for the next opening
+        reopened.trash['note #3'] -= user.TRASH_AGE
+        assert not reopened.compact_trash()
+        reopened.dump_data()
+
+        reopened = UserData('notes', str(tmp_path))
+        assert reopened.compact_trash()
+        assert reopened.history == []
+        assert reopened.trash == {}
+
+    def test_batch_deletion_is_not_compacted(self, user_data: UserData) -> None:
+        user_data.history = [f'note #{i}' for i in range(200)]
+        user_data.notes = dict.fromkeys(user_data.history, '')
+
+        user_data.trash_notes(user_data.history[:150])
+        assert not user_data.compact_trash()
+        assert len(user_data.trash) == 150
+        assert len(user_data.history) == 200
+
+    def test_export_notes(self, user_data: UserData, tmp_path) -> None:
+        user_data._abspath = str(tmp_path / 'notes.pickle')
+
+        path = user_data.export_notes({'note #3', 'note #1'})
+        with open(path) as file:
+            assert file.read() == '# note #1\n\ntext\n\n# note #3\n\ntext,\n text,\n text\n'
+
+    def test_touch(self, user_data: UserData, tmp_path) -> None:
+        user_data._abspath = str(tmp_path / 'notes.pickle')
+        user_data.touch(['note #1'])
+        user_data.notes.pop('note #2')
+        user_data.touch(['note #2', 'note #3'])
+
+        assert user_data.generation == 2
+        assert user_data.stamps == {'note #1': 1, 'note #3': 2}
+        assert user_data.changed_since(0) == {'note #1', 'note #2', 'note #3'}
+        assert user_data.changed_since(1) == {'note #2', 'note #3'}
+        assert user_data.changed_since(2) == set()
+
+        user_data.searches = ['#todo']
+        user_data.dump_data()
+        loaded = UserData('notes', str(tmp_path))
+        assert (loaded.generation, loaded.stamps, loaded.modified) == (2, user_data.stamps, user_data.modified)
+        assert loaded.searches == ['#todo']
+        assert loaded.changed_since(1) is None
+        assert loaded.changed_since(2) == set()
+        assert not loaded.changed
+        loaded.touch(['note #1'])
+        assert loaded.changed
+
+    def test_rename_note_rewrites_links(self, user_data: UserData) -> None:
+        user_data.notes['note #1'] = 'see [[note #2]]'
+        user_data.notes['note #3'] = '[[note #3]] and [[note #2]]'
+        untouched = user_data.notes['note #2'] = 'no links'
+        assert user_data.links.backlinks('note #2') == {'note #1', 'note #3'}
+
+        user_data.rename_note(1, 'renamed')
+        assert user_data.history == ['note #1', 'renamed', 'note #3']
+        assert user_data.notes['note #1'] == 'see [[renamed]]'
+        assert user_data.notes['note #3'] == '[[note #3]] and [[renamed]]'
+        assert user_data.notes['renamed'] is untouched
+        assert user_data.links.backlinks('renamed') == {'note #1', 'note #3'}
+        assert user_data.changed_since(0) == {'note #1', 'note #2', 'note #3', 'renamed'}
+
+    def test_rename_note_rewrites_only_links(self, user_data: UserData) -> None:
+        user_data.notes['note #1'] = '**see [[note #2]]** and _[[note #2]]_\n`[[note #2]]`\n```\n[[note #2]]\n```'
+
+        user_data.rename_note(1, 'renamed')
+        assert user_data.notes['note #1'] == (
+            '**see [[renamed]]** and _[[renamed]]_\n`[[note #2]]`\n```\n[[note #2]]\n```'
+        )
+        assert user_data.links.backlinks('renamed') == {'note #1'}
+
+    def test_set_text_updates_links(self, user_data: UserData) -> None:
+        assert user_data.links.backlinks('note #2') == set()
+
+        user_data.set_text('note #1', '[[note #2]]')
+        assert user_data.links.backlinks('note #2') == {'note #1'}
+
+        user_data.trash_notes(['note #1'])
+        user_data.compact_trash(everything=True)
+        assert user_data.links.backlinks('note #2') == set()